@@ -0,0 +1,140 @@
+"""
+Benchmarks for the dstatic hot paths at small, medium and huge screen
+sizes, compared against a saved baseline.
+
+    python -m benchmarks.bench_dstatic          compare with the baseline
+    python -m benchmarks.bench_dstatic --save   save a new baseline
+
+Timings depend on the machine, save a baseline on the machine the
+comparisons are run on.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+
+from dstatic import dstatic
+
+SIZES = [(24, 80), (60, 200), (150, 500)]
+STATIC_OPTIONS = {
+    "static": [],
+    "static -b": ["-b"],
+    "static -c": ["-c"],
+    "static -a": ["-a"],
+    "static ansi": ["--renderer", "ansi"],
+    "static density 0.25": ["--density", "0.25"],
+}
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 1.5
+
+
+def time_call(func, *args, repeat: int = 5) -> float:
+    """ Best time of one call in seconds. """
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def bench_setup() -> Dict[str, float]:
+    screen = dstatic.NullScreen(24, 80, 0)
+    with dstatic.headless_curses(screen):
+        color_pairs = dstatic.ColorPairs()
+        return {
+            "ColorPairs": time_call(dstatic.ColorPairs),
+            "ColorPairs.palette": time_call(
+                color_pairs.palette, ["B&W"] + dstatic.LIST_OF_COLORS[:-1]),
+            "setup_curses_colors": time_call(dstatic.setup_curses_colors,
+                                             "B&W"),
+            "setup_curses_colors_additive": time_call(
+                dstatic.setup_curses_colors_additive,
+                ["B&W"] + dstatic.LIST_OF_COLORS[:-1]),
+        }
+
+
+def bench_size(size_y: int, size_x: int) -> Dict[str, float]:
+    size = f"{size_x}x{size_y}"
+    results = {}
+    screen = dstatic.NullScreen(size_y, size_x, 0)
+    with dstatic.headless_curses(screen):
+        color_pairs = dstatic.ColorPairs()
+        for name, display in [("display_test_pattern1",
+                               dstatic.display_test_pattern1),
+                              ("display_test_pattern2",
+                               dstatic.display_test_pattern2),
+                              ("display_test_pattern3",
+                               dstatic.display_test_pattern3)]:
+            results[f"{name} {size}"] = time_call(display, screen, size_y,
+                                                  size_x, False, color_pairs)
+        results[f"blue_screen_display {size}"] = time_call(
+            dstatic.blue_screen_display, screen, size_y, size_x, color_pairs)
+        pairs, weights = color_pairs.palette(["all"])
+        attrs = color_pairs.attrs(pairs)
+        frame = dstatic.generate_frame(size_y, size_x - 1, weights)
+        results[f"paint_frame {size}"] = time_call(
+            dstatic.paint_frame, screen, frame, size_x - 1, " ", attrs)
+    for name, options in STATIC_OPTIONS.items():
+        args = dstatic.argument_parser(["--benchmark", "30", "--seed", "0",
+                                        "--benchmark_size", size] + options)
+        results[f"{name} {size}"] = dstatic.run_benchmark(args)["p50"]
+    return results
+
+
+def run_benchmarks() -> Dict[str, float]:
+    results = bench_setup()
+    for size_y, size_x in SIZES:
+        results.update(bench_size(size_y, size_x))
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float],
+            tolerance: float) -> int:
+    """ Prints the results against the baseline, returns the regressions. """
+    regressions = 0
+    for name, seconds in results.items():
+        line = f"{name:40} {seconds * 1000:10.3f} ms"
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f" {ratio:6.2f}x baseline"
+            if ratio > tolerance:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--save", action="store_true",
+                        help="Save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown against the baseline counted as a "
+                             f"regression. Default {DEFAULT_TOLERANCE}")
+    args = parser.parse_args(argv)
+    results = run_benchmarks()
+    if args.save:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        compare(results, {}, args.tolerance)
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return 0
+    try:
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+        print("No baseline saved, run with --save to make one")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{regressions} regression(s) over {args.tolerance}x baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,396 +1,1540 @@
 """ Snow / static simulation using curses. """
 import argparse
+import contextlib
 import curses
-import datetime
+import math
+import os
+import queue
 import random
+import re
+import selectors
+import signal
 import sys
+import threading
 import time
 
+from functools import lru_cache
+from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Optional
 from typing import Sequence
+from typing import Tuple
+from typing import Union
 
-if sys.version_info >= (3, 8):
-    import importlib.metadata as importlib_metadata
-else:
-    import importlib_metadata
+# numpy, asyncio, multiprocessing and the package metadata are slow to
+# import, they are only imported by the code that needs them.
+numpy = None
 
-VERSION = importlib_metadata.version("digital_static")
 
+@lru_cache(maxsize=None)
+def get_version() -> str:
+    """ The installed version, read from the package metadata. """
+    if sys.version_info >= (3, 8):
+        import importlib.metadata as importlib_metadata
+    else:
+        import importlib_metadata
+    return importlib_metadata.version("digital_static")
+
+
+def __getattr__(name: str):
+    # VERSION is looked up on first use, not on every import.
+    if name == "VERSION":
+        return get_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Each palette is a list of (color, weight), a color is drawn weight times
+# as often as a color of weight 1.
 COLORS = {
-    "all": [16, 255, 160, 40, 21, 184, 164, 44, 124, 22, 17],
-    "B&W": [16, 232, 233, 234, 235, 236, 237, 238, 240, 241,
-            242, 244, 245, 246, 247, 248, 249, 250, 252, 255],
-    "red": [52, 88, 124, 160, 196, 197, 160, 124, 160],
-    "green": [22, 28, 34, 40, 46, 76, 40, 40, 22, 40],
-    "blue": [17, 19, 20, 21, 26, 63, 21, 21, 17, 21],
-    "yellow": [58, 94, 100, 106, 178, 184, 184, 184, 100],
-    "cyan": [23, 30, 31, 44, 45, 51, 44, 44, 31],
-    "magenta": [53, 91, 127, 126, 164, 201, 164, 164, 126],
-    "all 8": [0, 1, 2, 3, 4, 5, 6, 7],
-    "B&W 8": [0, 7, 0, 7, 0, 7, 0, 7],
-    "red 8": [1, 1, 1, 1, 1, 7, 0, ],
-    "green 8": [2, 2, 2, 2, 2, 7, 0, ],
-    "blue 8": [4, 4, 4, 4, 4, 7, 0, ],
-    "yellow 8": [3, 3, 3, 3, 3, 7, 0, ],
-    "cyan 8": [6, 6, 6, 6, 6, 7, 0, ],
-    "magenta 8": [5, 5, 5, 5, 5, 7, 0, ],
+    "all": [(16, 1), (255, 1), (160, 1), (40, 1), (21, 1), (184, 1), (164, 1),
+            (44, 1), (124, 1), (22, 1), (17, 1)],
+    "B&W": [(16, 1), (232, 1), (233, 1), (234, 1), (235, 1), (236, 1),
+            (237, 1), (238, 1), (240, 1), (241, 1), (242, 1), (244, 1),
+            (245, 1), (246, 1), (247, 1), (248, 1), (249, 1), (250, 1),
+            (252, 1), (255, 1)],
+    "red": [(52, 1), (88, 1), (124, 2), (160, 3), (196, 1), (197, 1)],
+    "green": [(22, 2), (28, 1), (34, 1), (40, 4), (46, 1), (76, 1)],
+    "blue": [(17, 2), (19, 1), (20, 1), (21, 4), (26, 1), (63, 1)],
+    "yellow": [(58, 1), (94, 1), (100, 2), (106, 1), (178, 1), (184, 3)],
+    "cyan": [(23, 1), (30, 1), (31, 2), (44, 3), (45, 1), (51, 1)],
+    "magenta": [(53, 1), (91, 1), (127, 1), (126, 2), (164, 3), (201, 1)],
+    "all 8": [(0, 1), (1, 1), (2, 1), (3, 1), (4, 1), (5, 1), (6, 1), (7, 1)],
+    "B&W 8": [(0, 4), (7, 4)],
+    "red 8": [(1, 5), (7, 1), (0, 1)],
+    "green 8": [(2, 5), (7, 1), (0, 1)],
+    "blue 8": [(4, 5), (7, 1), (0, 1)],
+    "yellow 8": [(3, 5), (7, 1), (0, 1)],
+    "cyan 8": [(6, 5), (7, 1), (0, 1)],
+    "magenta 8": [(5, 5), (7, 1), (0, 1)],
 }
 LIST_OF_COLORS = ["red", "green", "blue", "yellow", "cyan", "magenta", "B&W"]
 DELAY_SPEED = [0.01, 0.04, 0.05, 0.06, 0.07, 0.09, 0.11, 0.15, 0.2, 0.4]
 DEFAULT_SPEED = 4
 CYCLE_COLOR_SPEED = [30, 80, 120, 160, 250]
+DEFAULT_DENSITY = 1.0
+DENSITY_STEP = 0.1
+KEY_POLL_TIME = 0.05  # seconds between key checks without add_reader()
+CACHED_SCALE_STEPS = 4  # governor scales a frame cache keeps frames for
 CURSES_NUM_SHIFT_CODES = {33: 1, 64: 2, 35: 3, 36: 4, 37: 5}
 CURSES_CODES_COLORS = {114: "red", 116: "green", 121: "blue", 117: "yellow",
                        105: "magenta", 111: "cyan"}
 NUMBER_OF_TEST_PATTERNS = 3
+BLUE_SCREEN_TEXT = """
+
+  A problem has been detected and windows has been shut down to prevent damage
+  to your computer.
+
+  PFN_LIST_CORRUPT
+
+  If this is the first time you've seen this Stop error screen,
+  restart your computer. If this screen appears again, follow
+  theses steps:
+
+  Check to make sure any new hardware or software is properly installed.
+  If this is a new installation, ask your hardware or software manufacturer
+  for any windows updates you might need.
+
+  If problems continue, disable or remove any newly installed hardware
+  or software. Disable BIOS memory options such as caching or shadowing.
+  If you need to use Safe Mode to remove or disable components, restart
+  your computer, press F8 to select Advance Startup Options, and then
+  select Safe Mode.
+
+  Technical information:
+  *** STOP: 0x0000004e (0x00000099, 0x00900009, 0x00000900, 0x00000900)
+"""
+PAIR_RUN = re.compile(rb"([^\x00])\1*")  # cells in a row sharing a pair
+
+
+def merge_weights(weighted_lists: Iterable[Sequence[Tuple[int, int]]]
+                  ) -> List[Tuple[int, int]]:
+    """
+    Joins lists of (item, weight) into one, an item in more than one list
+    is kept once with its weights added up. Items stay in the order they
+    first appear.
+    """
+    weights: Dict[int, int] = {}
+    for weighted_list in weighted_lists:
+        for item, weight in weighted_list:
+            weights[item] = weights.get(item, 0) + weight
+    return list(weights.items())
 
 
 def setup_curses_colors(color: str) -> int:
     # return the number of color pair init
     if curses.COLORS < 256:
         color = color + " 8"
-    color_number_list = COLORS[color]
+    color_weights = COLORS[color]
     [curses.init_pair(i + 1, color_number, color_number)
-     for i, color_number in enumerate(color_number_list)]
-    return len(color_number_list)
+     for i, (color_number, _) in enumerate(color_weights)]
+    return len(color_weights)
 
 
 def setup_curses_colors_additive(color_list: List[str]) -> int:
     # return the number of color pair init
-    color_list_numbers = []
-    for color in color_list:
-        if curses.COLORS < 256:
-            color = color + " 8"
-        color_list_numbers.extend(COLORS[color])
+    if curses.COLORS < 256:
+        color_list = [color + " 8" for color in color_list]
+    color_weights = merge_weights(COLORS[color] for color in color_list)
     [curses.init_pair(i + 1, color_number, color_number)
-     for i, color_number in enumerate(color_list_numbers)]
-    return len(color_list_numbers)
+     for i, (color_number, _) in enumerate(color_weights)]
+    return len(color_weights)
 
 
-def display_test_pattern1(screen, size_y: int, size_x: int,
-                          test_mode: bool) -> None:
-    color_names = {curses.COLOR_WHITE: "w", curses.COLOR_YELLOW: "y",
-                   curses.COLOR_CYAN: "c", curses.COLOR_GREEN: "g",
-                   curses.COLOR_MAGENTA: "m", curses.COLOR_RED: "r",
-                   curses.COLOR_BLUE: "b", curses.COLOR_BLACK: "B"}
-    screen.erase()
-    split_x = size_x // 8
-    colors = [curses.COLOR_WHITE, curses.COLOR_YELLOW, curses.COLOR_CYAN,
-              curses.COLOR_GREEN, curses.COLOR_MAGENTA, curses.COLOR_RED,
-              curses.COLOR_BLUE, curses.COLOR_BLACK]
-    for i, c in enumerate(colors, start=1):
-        curses.init_pair(i, c, c)
-    for i in range(1, 9):
-        ch = color_names[colors[i - 1]] if test_mode else " "
-        for y in range(size_y - 1):
-            for x in range(split_x * (i - 1), split_x * i):
-                screen.addstr(y, x, ch, curses.color_pair(i))
-    screen.refresh()
+class ColorPairs:
+    """
+    Color pairs set up once and then shared. Every color of the palettes
+    in COLORS gets its pair up front, with the " 8" palettes standing in
+    on terminals with less than 256 colors. A palette is a list of
+    (pair number, weight), so switching palettes needs no init_pair()
+    calls. The attribute of each pair is kept from when it is set up.
+    """
 
+    def __init__(self) -> None:
+        eight_colors = curses.COLORS < 256
+        self.numbers: Dict[Tuple[int, int], int] = {}
+        self.attributes: Dict[int, int] = {}
+        self.palettes: Dict[str, List[Tuple[int, int]]] = {}
+        self.merged: Dict[Tuple[str, ...],
+                          Tuple[Tuple[int, ...], Tuple[int, ...]]] = {}
+        for name, color_weights in COLORS.items():
+            if name.endswith(" 8") != eight_colors:
+                continue
+            self.palettes[name[:-2] if eight_colors else name] = [
+                (self.pair(color_number, color_number), weight)
+                for color_number, weight in color_weights]
 
-def display_test_pattern2(screen, size_y: int, size_x: int,
-                          test_mode: bool) -> None:
-    color_names = {curses.COLOR_WHITE: "w", curses.COLOR_YELLOW: "y",
-                   curses.COLOR_CYAN: "c", curses.COLOR_GREEN: "g",
-                   curses.COLOR_MAGENTA: "m", curses.COLOR_RED: "r",
-                   curses.COLOR_BLUE: "b", curses.COLOR_BLACK: "B"}
-    colors = [curses.COLOR_WHITE, curses.COLOR_YELLOW, curses.COLOR_CYAN,
-              curses.COLOR_GREEN, curses.COLOR_MAGENTA, curses.COLOR_RED,
-              curses.COLOR_BLUE, curses.COLOR_BLACK]
-    for i, c in enumerate(colors, start=1):
-        curses.init_pair(i, c, c)
-    split_x = size_x // 7
-    split_y = size_y // 10
-    screen.erase()
-    for i in range(1, 8):
-        ch = color_names[colors[i - 1]] if test_mode else " "
-        for y in range(size_y - split_y):
-            for x in range(split_x * (i - 1), split_x * i):
-                screen.addstr(y, x, ch, curses.color_pair(i))
-    for i in range(1, 8):
-        ch = color_names[colors[9 - i - 1]] if test_mode else " "
-        for y in range(size_y - split_y, size_y - 1):
-            for x in range(split_x * (i - 1), split_x * i):
-                screen.addstr(y, x, ch, curses.color_pair(9 - i) + curses.A_BOLD)
-    screen.refresh()
+    def pair(self, fg: int, bg: int) -> int:
+        """ Pair number for fg on bg, set up the first time it is used. """
+        number = self.numbers.get((fg, bg))
+        if number is None:
+            number = self.numbers[(fg, bg)] = len(self.numbers) + 1
+            curses.init_pair(number, fg, bg)
+            self.attributes[number] = curses.color_pair(number)
+        return number
+
+    def attr(self, fg: int, bg: int) -> int:
+        """ Attribute of the pair for fg on bg. """
+        return self.attributes[self.pair(fg, bg)]
+
+    def attrs(self, pairs: Sequence[int]) -> Tuple[int, ...]:
+        """
+        Attributes of the pairs after a 0, so that a palette index looks
+        up its attribute directly.
+        """
+        return (0,) + tuple(self.attributes[pair] for pair in pairs)
+
+    def palette(self, color_list: Sequence[str]
+                ) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """
+        Pairs of the palettes in color_list and their weights. A pair in
+        more than one of them is there once with its weights added up.
+        Each color list is only merged the first time.
+        """
+        key = tuple(color_list)
+        palette = self.merged.get(key)
+        if palette is None:
+            pairs, weights = zip(*merge_weights(self.palettes[color]
+                                                for color in key))
+            palette = self.merged[key] = (pairs, weights)
+        return palette
+
+
+# Where the frame generators get their randomness when they aren't given
+# an RNG, kept apart from the random module so that a seed gives the same
+# frames whatever else uses it.
+frame_random = random.Random()
+
+
+def seed_frames(seed: Optional[int] = None) -> None:
+    """
+    Seeds the frame generators, the same seed gives the same frames.
+    None seeds them from the system.
+    """
+    frame_random.seed(seed)
+    numpy_rng.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def pair_table(weights: Tuple[int, ...]) -> Tuple[bytes, bytes]:
+    """
+    Translate table mapping random bytes onto palette indexes 1 to
+    len(weights) and the bytes to delete. Index i gets weights[i - 1] of
+    every sum(weights) bytes, which add up to at most 256. Bytes past the
+    last whole multiple of the sum are deleted so the weights stay exact.
+    Like an alias table it draws an index with one lookup, however
+    uneven the weights. Raises ValueError for weights over 256, no byte
+    could be kept.
+    """
+    total = sum(weights)
+    if not 0 < total <= 256:
+        raise ValueError(f"palette weights add up to {total}, "
+                         "they have to add up to 1 to 256")
+    limit = 256 - 256 % total
+    cycle = b"".join(bytes([i]) * weight
+                     for i, weight in enumerate(weights, start=1))
+    return cycle * (limit // total) + bytes(256 - limit), bytes(
+        range(limit, 256))
+
+
+def random_pairs(weights: Tuple[int, ...], count: int, rng=None) -> bytes:
+    """
+    Returns count random palette indexes from 1 to len(weights), each
+    drawn in proportion to its weight.
+    """
+    if rng is None:
+        rng = frame_random
+    table, delete = pair_table(weights)
+    pairs = b""
+    while len(pairs) < count:
+        need = count - len(pairs) + 16
+        chunk = rng.getrandbits(need * 8).to_bytes(need, "little")
+        pairs += chunk.translate(table, delete)
+    return pairs[:count]
+
+
+class Frame(bytearray):
+    """
+    A frame of height rows of width cells, one byte per cell holding a
+    palette index, 0 for a cell left as it is. Being a bytearray it
+    shares its memory through the buffer protocol, so renderers, caches
+    and numpy read and write it without copies.
+    """
+
+    __slots__ = ("height", "width")
+
+    def __init__(self, height: int, width: int, cells=None) -> None:
+        super().__init__(height * width if cells is None else cells)
+        self.height = height
+        self.width = width
+
+    def __reduce_ex__(self, protocol):
+        return Frame, (self.height, self.width, bytes(self))
+
+    def row(self, y: int) -> memoryview:
+        """ The cells of row y, without copying them. """
+        return memoryview(self)[y * self.width:(y + 1) * self.width]
+
+
+def generate_frame(size_y: int, width: int, weights: Tuple[int, ...],
+                   count: Optional[int] = None, rng=None) -> Frame:
+    """
+    Generates a frame as one palette index from 1 to len(weights) per
+    cell, row by row, each drawn in proportion to its weight. With count
+    None every cell gets one. Otherwise count cells are picked at random
+    (repeats allowed, last one wins) and the cells not picked are 0.
+    Draws from rng, frame_random when None.
+    """
+    if rng is None:
+        rng = frame_random
+    cells = size_y * width
+    if count is None:
+        return Frame(size_y, width, random_pairs(weights, cells, rng))
+    frame = Frame(size_y, width)
+    if cells == 0 or count <= 0:
+        return frame
+    # 32 random bits per pick scaled onto the cell range.
+    positions = memoryview(rng.getrandbits(count * 32).to_bytes(
+        count * 4, "little")).cast("I")
+    for position, pair in zip(positions,
+                              random_pairs(weights, count, rng)):
+        frame[(position * cells) >> 32] = pair
+    return frame
+
+
+def import_numpy() -> bool:
+    """ Imports numpy on first use, False when it isn't installed. """
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as numpy_module
+        except ImportError:
+            return False
+        numpy = numpy_module
+    return True
+
+
+@lru_cache(maxsize=None)
+def numpy_rng():
+    import_numpy()
+    return numpy.random.default_rng(frame_random.getrandbits(128))
+
+
+class PCG64Random:
+    """
+    numpy's PCG64 behind the getrandbits() of random.Random. It steps
+    128 bits of integer state in C and fills many palette indexes a call.
+    """
+
+    def __init__(self, seed: int) -> None:
+        import_numpy()
+        self.generator = numpy.random.Generator(numpy.random.PCG64(seed))
+
+    def getrandbits(self, k: int) -> int:
+        value = int.from_bytes(self.generator.bytes((k + 7) // 8), "little")
+        return value >> -k % 8
+
+
+# RNGs a frame can draw from. Each is made from an int seed and has a
+# getrandbits() like random.Random.
+RNGS = {"mt": random.Random, "pcg64": PCG64Random}
+
+
+def get_rng(name: str):
+    """ Returns the RNG class, falling back to mt without numpy. """
+    if name == "pcg64" and not import_numpy():
+        return random.Random
+    return RNGS[name]
+
+
+def frame_rng(rng_type, seed: int, number: int):
+    """
+    The RNG for frame number of a run seeded with seed. Every frame gets
+    one of its own, so a frame is the same whichever thread makes it and
+    whatever frames were made or thrown away before it.
+    """
+    return rng_type((seed % 2 ** 64) << 64 | number)
+
+
+def generate_frame_numpy(size_y: int, width: int, weights: Tuple[int, ...],
+                         count: Optional[int] = None, rng=None) -> Frame:
+    """
+    Same as generate_frame() but vectorized with numpy, writing straight
+    into the frame's memory.
+    """
+    import_numpy()
+    if rng is None:
+        rng = numpy_rng()
+    elif isinstance(rng, PCG64Random):
+        rng = rng.generator
+    else:
+        rng = numpy.random.default_rng(rng.getrandbits(128))
+    table, delete = pair_table(weights)
+    lookup = numpy.frombuffer(table, dtype=numpy.uint8)[:256 - len(delete)]
+    frame = Frame(size_y, width)
+    if not frame:
+        return frame
+    cells = numpy.frombuffer(frame, dtype=numpy.uint8)
+    if count is None:
+        numpy.take(lookup, rng.integers(0, len(lookup), size=cells.size),
+                   out=cells, mode="clip")
+    elif count > 0:
+        cells[rng.integers(0, cells.size, size=count)] = \
+            lookup[rng.integers(0, len(lookup), size=count)]
+    return frame
+
+
+ENGINES = {"python": generate_frame, "numpy": generate_frame_numpy}
+
+
+def get_engine(name: str):
+    """ Returns the frame generator, falling back to python without numpy. """
+    if name == "numpy" and not import_numpy():
+        return generate_frame
+    return ENGINES[name]
+
+
+def paint_frame(screen, frame: bytes, width: int, char: str,
+                attrs: Sequence[int]) -> None:
+    """
+    Paint every cell of the frame that has a color, cell value n with
+    attribute attrs[n]. Each run of cells in a row sharing a color is
+    painted with one addstr.
+    """
+    if not width:
+        return
+    for y in range(len(frame) // width):
+        row_start = y * width
+        for run in PAIR_RUN.finditer(frame, row_start, row_start + width):
+            start, end = run.span()
+            screen.addstr(y, start - row_start, char * (end - start),
+                          attrs[frame[start]])
+
+
+class FrameCache:
+    """
+    Ring buffer of generated frames. The first size frames for a key are
+    generated and kept, after that they are handed out in turn. A new
+    key empties the ring. A size of 0 generates every frame.
+    """
+
+    def __init__(self, size: int, generate) -> None:
+        self.size = size
+        self.generate = generate
+        self.key = None
+        self.frames: List[Frame] = []
+        self.index = 0
+
+    def get(self, key, *frame_args) -> Frame:
+        if key != self.key:
+            self.key = key
+            self.frames = []
+            self.index = 0
+        if len(self.frames) < self.size:
+            self.frames.append(self.generate(*frame_args))
+            return self.frames[-1]
+        if not self.frames:
+            return self.generate(*frame_args)
+        frame = self.frames[self.index]
+        self.index = (self.index + 1) % self.size
+        return frame
+
+
+class FrameProducer:
+    """
+    Generates frames on a worker thread while the main thread paints
+    and sleeps. get() asks for a frame by number and the thread goes on
+    to the numbers after it with the same arguments. Frames come through
+    a bounded queue together with the number and arguments they were
+    made with, get() drops any it didn't ask for, so a palette or size
+    change never shows a stale frame. An error generating a frame is
+    raised by get() in its place.
+    """
+
+    def __init__(self, generate, depth: int = 2) -> None:
+        self.generate = generate
+        self.frames: "queue.Queue[Tuple[tuple, Union[Frame, Exception]]]"
+        self.frames = queue.Queue(maxsize=depth)
+        self.request: Optional[tuple] = None  # number and arguments to make
+        self.expected: Optional[tuple] = None  # what get() asks for next
+        self.wake = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        request = None
+        while self.running:
+            if self.request is None:
+                self.wake.wait()
+                continue
+            if self.request is not request:
+                request = self.request
+                number, frame_args = request
+            try:
+                item = ((number, frame_args),
+                        self.generate(number, *frame_args))
+            except Exception as error:
+                item = ((number, frame_args), error)
+            while self.running and self.request is request:
+                try:
+                    self.frames.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            number += 1
+
+    def get(self, number: int, *frame_args) -> Frame:
+        if self.expected != (number, frame_args):
+            self.request = (number, frame_args)
+            self.wake.set()
+        self.expected = (number + 1, frame_args)
+        while True:
+            made_with, frame = self.frames.get()
+            if made_with != (number, frame_args):
+                continue
+            if isinstance(frame, Exception):
+                raise frame
+            return frame
+
+    def stop(self) -> None:
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+
+
+_band_buffer = None
+_band_generate = None
+
+
+def _init_band_worker(buffer, generate) -> None:
+    global _band_buffer, _band_generate
+    # Workers share the terminal's process group, leave Ctrl-C to the
+    # main process, which stops the pool.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _band_buffer = memoryview(buffer).cast("B")
+    _band_generate = generate
+
+
+def _generate_band(start_row: int, end_row: int, width: int,
+                   weights: Tuple[int, ...], count: Optional[int],
+                   rng_type, seed: int) -> None:
+    # Bands go to whichever worker is free, so each brings its own seed.
+    band = _band_generate(end_row - start_row, width, weights, count,
+                          rng_type(seed))
+    _band_buffer[start_row * width:end_row * width] = band
+
+
+class FramePool:
+    """
+    Generates frames split into row bands across a multiprocessing pool.
+    Workers write their band into shared memory, so only the band bounds
+    and a seed are pickled. Each band gets its share of count in proportion
+    to its cells, keeping the distribution of a single process frame.
+    There is one shared buffer, so frames are made one at a time even
+    when get() is called from more than one thread.
+    """
+
+    def __init__(self, workers: int, generate) -> None:
+        self.workers = workers
+        self.generate = generate
+        self.pool = None
+        self.buffer = memoryview(b"")
+        self.lock = threading.RLock()
+
+    def _start(self, cells: int) -> None:
+        import multiprocessing
+        self.stop()
+        shared = multiprocessing.RawArray("B", cells)
+        self.buffer = memoryview(shared).cast("B")
+        self.pool = multiprocessing.Pool(self.workers, _init_band_worker,
+                                         (shared, self.generate))
+
+    def get(self, size_y: int, width: int, weights: Tuple[int, ...],
+            count: Optional[int] = None, rng=None) -> Frame:
+        if rng is None:
+            rng = frame_random
+        cells = size_y * width
+        if not cells:
+            return Frame(size_y, width)
+        with self.lock:
+            if cells > len(self.buffer):
+                self._start(cells)
+            rows = [size_y * i // self.workers
+                    for i in range(self.workers + 1)]
+            bands = []
+            for start_row, end_row in zip(rows, rows[1:]):
+                if start_row == end_row:
+                    continue
+                band_count = None
+                if count is not None:
+                    band_count = (count * end_row // size_y
+                                  - count * start_row // size_y)
+                bands.append((start_row, end_row, width, weights,
+                              band_count, type(rng), rng.getrandbits(64)))
+            self.pool.starmap(_generate_band, bands)
+            return Frame(size_y, width, self.buffer[:cells])
+
+    def stop(self) -> None:
+        with self.lock:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
+
+
+class FrameScheduler:
+    """
+    Paces frames against a monotonic clock. wait() sleeps only for what
+    is left of the current frame's time. A late frame doesn't build up
+    lag, the frames it ran over are skipped and counted. A sleep that
+    returns True was woken early and leaves the deadline where it is.
+    Also keeps the run timer on the same clock, run_time 0 is no run timer.
+    """
+
+    def __init__(self, frame_time: float, run_time: float = 0,
+                 clock=time.monotonic, sleep=time.sleep) -> None:
+        self.frame_time = frame_time
+        self.clock = clock
+        self.sleep = sleep
+        now = clock()
+        self.deadline = now + frame_time
+        self.end_time = now + run_time if run_time else None
+        self.skipped = 0
+
+    def wait(self) -> None:
+        delay = self.deadline - self.clock()
+        if delay > 0 and self.sleep(delay):
+            return
+        self.advance(delay)
+
+    def advance(self, delay: float) -> None:
+        """
+        Moves the deadline on to the next frame. delay is how long was
+        left before the deadline, negative when the frame ran late.
+        """
+        if delay > 0:
+            self.deadline += self.frame_time
+        else:
+            missed = int(-delay // self.frame_time)
+            self.skipped += missed
+            self.deadline += (missed + 1) * self.frame_time
+
+    def time_left(self) -> Optional[float]:
+        """ Seconds left on the run timer, None without one. """
+        if self.end_time is None:
+            return None
+        return self.end_time - self.clock()
+
+    def expired(self) -> bool:
+        return self.end_time is not None and self.clock() >= self.end_time
+
+
+class QualityGovernor:
+    """
+    Scales how many cells a frame updates to hold the frame time. A frame
+    over its time cuts the scale in proportion, frames with time to spare
+    grow it back a step at a time.
+    """
+
+    def __init__(self, minimum: float = 0.05, step: float = 0.05) -> None:
+        self.scale = 1.0
+        self.minimum = minimum
+        self.step = step
+
+    def update(self, elapsed: float, budget: float) -> None:
+        if elapsed > budget:
+            self.scale = max(self.minimum,
+                             self.scale * max(0.5, budget / elapsed))
+        elif elapsed < budget * 0.75:
+            self.scale = min(1.0, self.scale + self.step)
+
+
+def frame_time(args: argparse.Namespace) -> float:
+    """ Seconds per frame from --fps, or else the delay setting. """
+    return 1 / args.fps if args.fps else DELAY_SPEED[args.delay]
+
+
+def ansi_pair_code(pair: int) -> bytes:
+    """ SGR sequence setting the colors of an initialised color pair. """
+    fg, bg = curses.pair_content(pair)
+    if curses.COLORS < 256:
+        return b"\x1b[3%d;4%dm" % (fg, bg)
+    return b"\x1b[38;5;%d;48;5;%dm" % (fg, bg)
+
+
+def paint_frame_ansi(screen, frame: bytes, width: int, char: str,
+                     attrs: Sequence[int]) -> None:
+    """
+    Same as paint_frame() but builds the frame as one buffer of cursor
+    moves and SGR colors and writes it straight to the terminal,
+    bypassing curses.
+    """
+    if not width or not any(frame):
+        return
+    codes = [b""] + [ansi_pair_code(curses.pair_number(attr))
+                     for attr in attrs[1:]]
+    char_bytes = char.encode()
+    buffer = bytearray()
+    last_pair = 0
+    for y in range(len(frame) // width):
+        row_start = y * width
+        cursor = -1
+        for run in PAIR_RUN.finditer(frame, row_start, row_start + width):
+            start, end = run.span()
+            if start != cursor:
+                buffer += b"\x1b[%d;%dH" % (y + 1, start - row_start + 1)
+            if frame[start] != last_pair:
+                last_pair = frame[start]
+                buffer += codes[last_pair]
+            buffer += char_bytes * (end - start)
+            cursor = end
+    buffer += b"\x1b[0m"
+    fd = sys.stdout.fileno()
+    data = memoryview(buffer)
+    while data:
+        data = data[os.write(fd, data):]
+
+
+RENDERERS = {"curses": paint_frame, "ansi": paint_frame_ansi}
+
+
+@lru_cache(maxsize=4)
+def byte_ones(length: int) -> int:
+    """ An int with the lowest bit set in each of length bytes. """
+    return int.from_bytes(b"\x01" * length, "little")
 
 
-def display_test_pattern3(screen, size_y: int, size_x: int,
-                          test_mode: bool) -> None:
+def nonzero_bytes(value: int, ones: int) -> int:
+    """ Lowest bit of each byte of value set if the byte isn't 0. """
+    value |= value >> 4
+    value |= value >> 2
+    value |= value >> 1
+    return value & ones
+
+
+class ShadowFrame:
+    """
+    The palette index last painted in each cell of the screen, 0 when it
+    isn't known. diff() takes a frame down to the cells that change the
+    screen, counting the cells written and the redundant writes skipped.
+    The whole frame is compared at once as one big int.
+    """
+
+    def __init__(self) -> None:
+        self.cells = b""
+        self.written = 0
+        self.redundant = 0
+
+    def reset(self) -> None:
+        """ Forget the screen, after something else has drawn on it. """
+        self.cells = b""
+
+    def diff(self, frame: bytes) -> bytes:
+        length = len(frame)
+        if len(self.cells) != length:
+            self.cells = bytes(length)
+        ones = byte_ones(length)
+        new = int.from_bytes(frame, "little")
+        old = int.from_bytes(self.cells, "little")
+        mask = nonzero_bytes(new ^ old, ones) & nonzero_bytes(new, ones)
+        mask *= 0xff
+        changed = new & mask
+        self.cells = ((old & ~mask) | changed).to_bytes(length, "little")
+        changed_frame = changed.to_bytes(length, "little")
+        written = length - changed_frame.count(0)
+        self.written += written
+        self.redundant += length - frame.count(0) - written
+        return changed_frame
+
+
+@lru_cache(maxsize=32)
+def test_pattern_layout(pattern: int, size_y: int, size_x: int,
+                        test_mode: bool, colors: int) -> Tuple[
+                            Tuple[int, ...],
+                            Tuple[Tuple[int, int, str, int, bool], ...]]:
+    """
+    Returns the colors and the (y, x, text, pair, bold) segments painting
+    a test pattern, one segment per band per row. Segment pair n has
+    colors[n - 1].
+    """
     color_names = {curses.COLOR_WHITE: "w", curses.COLOR_YELLOW: "y",
                    curses.COLOR_CYAN: "c", curses.COLOR_GREEN: "g",
                    curses.COLOR_MAGENTA: "m", curses.COLOR_RED: "r",
                    curses.COLOR_BLUE: "b", curses.COLOR_BLACK: "B",
                    17: "n"}
-    if curses.COLORS < 256:
-        colors = [curses.COLOR_WHITE, curses.COLOR_YELLOW, curses.COLOR_CYAN,
-                  curses.COLOR_GREEN, curses.COLOR_MAGENTA, curses.COLOR_RED,
-                  curses.COLOR_BLUE, curses.COLOR_BLACK, curses.COLOR_BLUE]
+    pattern_colors = [curses.COLOR_WHITE, curses.COLOR_YELLOW,
+                      curses.COLOR_CYAN, curses.COLOR_GREEN,
+                      curses.COLOR_MAGENTA, curses.COLOR_RED,
+                      curses.COLOR_BLUE, curses.COLOR_BLACK]
+    # (first row, end row, first x, end x, pair, bold, color of the char)
+    bands = []
+    if pattern == 1:
+        split_x = size_x // 8
+        for i in range(1, 9):
+            bands.append((0, size_y - 1, split_x * (i - 1), split_x * i,
+                          i, False, i))
+    elif pattern == 2:
+        split_x = size_x // 7
+        split_y = size_y // 10
+        for i in range(1, 8):
+            bands.append((0, size_y - split_y, split_x * (i - 1),
+                          split_x * i, i, False, i))
+        for i in range(1, 8):
+            bands.append((size_y - split_y, size_y - 1, split_x * (i - 1),
+                          split_x * i, 9 - i, True, 9 - i))
     else:
-        colors = [curses.COLOR_WHITE, curses.COLOR_YELLOW, curses.COLOR_CYAN,
-                  curses.COLOR_GREEN, curses.COLOR_MAGENTA, curses.COLOR_RED,
-                  curses.COLOR_BLUE, curses.COLOR_BLACK, 17]
-    for i, c in enumerate(colors, start=1):
-        curses.init_pair(i, c, c)
-    split_x = size_x // 7
-    split_y = size_y // 10
+        pattern_colors.append(curses.COLOR_BLUE if colors < 256 else 17)
+        split_x = size_x // 7
+        split_y = size_y // 10
+        for i in range(1, 8):
+            bands.append((0, size_y - split_y * 4, split_x * (i - 1),
+                          split_x * i, i, False, i))
+        for i in range(1, 8):
+            bands.append((size_y - split_y * 4, size_y - split_y * 3,
+                          split_x * (i - 1), split_x * i, 9 - i, True, i))
+        split_x = size_x // 6
+        bands.append((size_y - split_y * 3, size_y - 1, 0, split_x + 5,
+                      9, False, 9))
+        bands.append((size_y - split_y * 3, size_y - 1, split_x + 5,
+                      split_x * 2, 1, True, 1))
+        bands.append((size_y - split_y * 3, size_y - 1, split_x * 2,
+                      split_x * 3 + 5, 9, False, 9))
+    segments = []
+    for start_y, end_y, start_x, end_x, pair, bold, char_color in bands:
+        end_x = min(end_x, size_x)
+        if start_x >= end_x:
+            continue
+        ch = color_names[pattern_colors[char_color - 1]] if test_mode else " "
+        text = ch * (end_x - start_x)
+        segments.extend((y, start_x, text, pair, bold)
+                        for y in range(start_y, end_y))
+    return tuple(pattern_colors), tuple(segments)
+
+
+def display_test_pattern(screen, pattern: int, size_y: int, size_x: int,
+                         test_mode: bool,
+                         color_pairs: Optional[ColorPairs] = None) -> None:
+    color_pairs = color_pairs or ColorPairs()
+    colors, segments = test_pattern_layout(pattern, size_y, size_x,
+                                           test_mode, curses.COLORS)
+    attrs = color_pairs.attrs([color_pairs.pair(c, c) for c in colors])
+    bold_attrs = [attr | curses.A_BOLD for attr in attrs]
     screen.erase()
-    for i in range(1, 8):
-        ch = color_names[colors[i - 1]] if test_mode else " "
-        for y in range(size_y - split_y * 4):
-            for x in range(split_x * (i - 1), split_x * i):
-                screen.addstr(y, x, ch, curses.color_pair(i))
-    for i in range(1, 8):
-        ch = color_names[colors[i - 1]] if test_mode else " "
-        for y in range(size_y - split_y * 4, size_y - split_y * 3):
-            for x in range(split_x * (i - 1), split_x * i):
-                screen.addstr(y, x, ch, curses.color_pair(9 - i) + curses.A_BOLD)
-    split_x = size_x // 6
-    ch = color_names[colors[8]] if test_mode else " "
-    for y in range(size_y - split_y * 3, size_y - 1):
-        for x in range(0, split_x + 5):
-            screen.addstr(y, x, ch, curses.color_pair(9))
-    ch = color_names[colors[0]] if test_mode else " "
-    for y in range(size_y - split_y * 3, size_y - 1):
-        for x in range(split_x + 5, split_x * 2):
-            screen.addstr(y, x, ch, curses.color_pair(1) + curses.A_BOLD)
-    ch = color_names[colors[8]] if test_mode else " "
-    for y in range(size_y - split_y * 3, size_y - 1):
-        for x in range(split_x * 2, split_x * 3 + 5):
-            screen.addstr(y, x, ch, curses.color_pair(9))
+    for y, x, text, pair, bold in segments:
+        screen.addstr(y, x, text, bold_attrs[pair] if bold else attrs[pair])
     screen.refresh()
 
 
-def blue_screen_display(screen, size_y: int, size_x: int) -> None:
-    text = """
+def display_test_pattern1(screen, size_y: int, size_x: int, test_mode: bool,
+                          color_pairs: Optional[ColorPairs] = None) -> None:
+    display_test_pattern(screen, 1, size_y, size_x, test_mode, color_pairs)
 
-  A problem has been detected and windows has been shut down to prevent damage
-  to your computer.
 
-  PFN_LIST_CORRUPT
+def display_test_pattern2(screen, size_y: int, size_x: int, test_mode: bool,
+                          color_pairs: Optional[ColorPairs] = None) -> None:
+    display_test_pattern(screen, 2, size_y, size_x, test_mode, color_pairs)
 
-  If this is the first time you've seen this Stop error screen,
-  restart your computer. If this screen appears again, follow
-  theses steps:
 
-  Check to make sure any new hardware or software is properly installed.
-  If this is a new installation, ask your hardware or software manufacturer
-  for any windows updates you might need.
+def display_test_pattern3(screen, size_y: int, size_x: int, test_mode: bool,
+                          color_pairs: Optional[ColorPairs] = None) -> None:
+    display_test_pattern(screen, 3, size_y, size_x, test_mode, color_pairs)
 
-  If problems continue, disable or remove any newly installed hardware
-  or software. Disable BIOS memory options such as caching or shadowing.
-  If you need to use Safe Mode to remove or disable components, restart
-  your computer, press F8 to select Advance Startup Options, and then
-  select Safe Mode.
 
-  Technical information:
-  *** STOP: 0x0000004e (0x00000099, 0x00900009, 0x00000900, 0x00000900)
-"""
-    curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLUE)
+@lru_cache(maxsize=8)
+def blue_screen_lines(size_y: int, size_x: int) -> Tuple[str, ...]:
+    """ The blue screen text cut and padded to whole rows of the screen. """
+    text_list = BLUE_SCREEN_TEXT.splitlines()[:size_y]
+    text_list += [""] * (size_y - len(text_list))
+    return tuple(line[:size_x].ljust(size_x) for line in text_list)
+
+
+def blue_screen_display(screen, size_y: int, size_x: int,
+                        color_pairs: Optional[ColorPairs] = None) -> None:
+    color_pairs = color_pairs or ColorPairs()
+    color = color_pairs.attr(curses.COLOR_WHITE, curses.COLOR_BLUE)
     screen.erase()
-    text_list = text.splitlines()
-    for y in range(size_y):
-        if y < len(text_list):
-            screen.addstr(y, 0, text_list[y], curses.color_pair(1))
-            start_x = len(text_list[y])
-        else:
-            start_x = 0
-        for x in range(start_x, size_x):
-            try:
-                screen.addstr(y, x, " ", curses.color_pair(1))
-            except curses.error:
-                pass
+    lines = blue_screen_lines(size_y, size_x)
+    for y, line in enumerate(lines[:-1]):
+        screen.addstr(y, 0, line, color)
+    try:
+        # The cursor can't move past the bottom right cell once written.
+        screen.addstr(size_y - 1, 0, lines[-1], color)
+    except curses.error:
+        pass
     screen.refresh()
 
 
-def static(screen, args: argparse.Namespace) -> None:
-    """ Main curses window. """
-    curses.curs_set(0)  # Set the cursor to off.
-    screen.timeout(0)  # Turn blocking off for screen.getch().
-    curses.use_default_colors()
-    cycle_color = cycle_time = 0
-    cycle_change = CYCLE_COLOR_SPEED[3]
-    additive_list = ["B&W"]
-    test_pattern = 0
-    blue_screen = 0
-    if args.black_white:
-        color_name = "B&W"
-        num_of_pairs = setup_curses_colors(color_name)
-    elif args.color is not None:
-        color_name = args.color
-        num_of_pairs = setup_curses_colors(color_name)
-    elif args.cycle_color_mode:
-        color_name = LIST_OF_COLORS[cycle_color]
-        num_of_pairs = setup_curses_colors(color_name)
-    elif args.additive:
-        color_name = "Add"
-        num_of_pairs = setup_curses_colors_additive(additive_list)
-    else:
-        color_name = "all"
-        num_of_pairs = setup_curses_colors(color_name)
-    color_changed = False
-    start_time = datetime.datetime.now()
-    end_time = start_time + datetime.timedelta(seconds=args.run_timer)
-    size_y, size_x = screen.getmaxyx()
-    run = True
-    while run:
-        if curses.is_term_resized(size_y, size_x):
-            size_y, size_x = screen.getmaxyx()
-            if test_pattern:
+def resize_terminal() -> None:
+    """
+    Passes a new terminal size on to curses with resizeterm(), which
+    queues a KEY_RESIZE for getch() just like curses' own handler.
+    """
+    try:
+        columns, lines = os.get_terminal_size(sys.stdout.fileno())
+    except OSError:
+        return
+    if curses.is_term_resized(lines, columns):
+        curses.resizeterm(lines, columns)
+
+
+class TerminalEvents:
+    """
+    Sleeps in the kernel with selectors until a key is ready on stdin, the
+    terminal is resized or a timeout runs out. SIGWINCH wakes it through
+    the signal wakeup fd, which then passes the new size on with
+    resize_terminal(). Raises ValueError off the main thread, where the
+    wakeup fd can't be set.
+    """
+
+    def __init__(self, fd: int = 0) -> None:
+        self.wakeup_read, self.wakeup_write = os.pipe()
+        os.set_blocking(self.wakeup_read, False)
+        os.set_blocking(self.wakeup_write, False)
+        try:
+            self.old_wakeup_fd = signal.set_wakeup_fd(
+                self.wakeup_write, warn_on_full_buffer=False)
+        except ValueError:
+            os.close(self.wakeup_read)
+            os.close(self.wakeup_write)
+            raise
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(fd, selectors.EVENT_READ)
+        self.selector.register(self.wakeup_read, selectors.EVENT_READ)
+        self.old_handler = signal.signal(signal.SIGWINCH,
+                                         lambda signum, frame: None)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """ Returns True when woken by a key or a signal. """
+        ready = self.selector.select(None if timeout is None
+                                     else max(0.0, timeout))
+        if any(key.fd == self.wakeup_read for key, _ in ready):
+            self._resize()
+        return bool(ready)
+
+    def _resize(self) -> None:
+        with contextlib.suppress(BlockingIOError):
+            while os.read(self.wakeup_read, 512):
+                pass
+        resize_terminal()
+
+    def close(self) -> None:
+        signal.set_wakeup_fd(self.old_wakeup_fd)
+        signal.signal(signal.SIGWINCH, self.old_handler or signal.SIG_DFL)
+        self.selector.close()
+        os.close(self.wakeup_read)
+        os.close(self.wakeup_write)
+
+
+def wait_for_key(screen, timeout: Optional[float] = None,
+                 events: Optional[TerminalEvents] = None) -> int:
+    """
+    Blocks until a key, a resize or timeout seconds when given, then
+    returns getch(). Waits on events when given, otherwise in getch()
+    which is then set back to not blocking.
+    """
+    if events is not None:
+        events.wait(timeout)
+        return screen.getch()
+    screen.timeout(-1 if timeout is None else max(0, int(timeout * 1000)))
+    try:
+        return screen.getch()
+    finally:
+        screen.timeout(0)
+
+
+class StaticSession:
+    """
+    State of a running static display and the work shared by static() and
+    static_async(): drawing a frame or an idle screen, stepping the color
+    cycle and handling keys. Waiting between frames and for keys is left
+    to the caller.
+    """
+
+    def __init__(self, screen, args: argparse.Namespace,
+                 scheduler: FrameScheduler) -> None:
+        curses.curs_set(0)  # Set the cursor to off.
+        screen.timeout(0)  # Turn blocking off for screen.getch().
+        curses.use_default_colors()
+        self.screen = screen
+        self.args = args
+        self.scheduler = scheduler
+        self.cycle_color = self.cycle_time = 0
+        self.cycle_start = scheduler.clock()
+        self.cycle_change = CYCLE_COLOR_SPEED[3]
+        self.additive_list = ["B&W"]
+        self.test_pattern = args.test_pattern
+        self.blue_screen = 0
+        self.color_pairs = ColorPairs()
+        if args.black_white:
+            self.set_color("B&W")
+        elif args.color is not None:
+            self.set_color(args.color)
+        elif args.cycle_color_mode:
+            self.set_color(LIST_OF_COLORS[self.cycle_color])
+        elif args.additive:
+            self.color_name = "Add"
+            self.set_pairs(self.additive_list)
+        else:
+            self.set_color("all")
+        self.rng_type = get_rng(args.rng)
+        self.seed = (random.SystemRandom().getrandbits(64)
+                     if args.seed is None else args.seed)
+        self.frame_number = 0
+        self.generate = get_engine(args.engine)
+        self.frame_pool = (FramePool(args.workers, self.generate)
+                           if args.workers else None)
+        if self.frame_pool:
+            self.generate = self.frame_pool.get
+        self.paint = RENDERERS[args.renderer]
+        self.producer = (FrameProducer(self.make_frame) if args.threaded
+                         else None)
+        self.frame_cache = FrameCache(args.frame_cache,
+                                      self.producer.get if self.producer
+                                      else self.make_frame)
+        self.raw_output = False  # terminal holds output curses doesn't know
+        self.drawn_screen = None
+        self.color_changed = False
+        self.governor = QualityGovernor()
+        self.shadow = ShadowFrame()
+        self.run = True
+        self.frozen = False
+        self.hold = 0  # seconds to leave the screen cleared before drawing
+        self.size_y, self.size_x = screen.getmaxyx()
+        screen.refresh()  # initial clear before anything is painted
+
+    @property
+    def idle(self) -> bool:
+        """ True on a test pattern or the blue screen. """
+        return bool(self.test_pattern or self.blue_screen)
+
+    def set_pairs(self, color_list: Sequence[str]) -> None:
+        self.pairs, self.weights = self.color_pairs.palette(color_list)
+        self.attrs = self.color_pairs.attrs(self.pairs)
+        self.color_changed = True
+
+    def set_color(self, color_name: str) -> None:
+        self.color_name = color_name
+        self.set_pairs([color_name])
+
+    def make_frame(self, number: int, size_y: int, width: int,
+                   weights: Tuple[int, ...],
+                   count: Optional[int] = None) -> Frame:
+        """ Generates frame number of the run from its own RNG. """
+        return self.generate(size_y, width, weights, count,
+                             frame_rng(self.rng_type, self.seed, number))
+
+    def draw(self) -> None:
+        """ Draws the next frame, or the idle screen when it changed. """
+        screen = self.screen
+        args = self.args
+        if curses.is_term_resized(self.size_y, self.size_x):
+            self.size_y, self.size_x = screen.getmaxyx()
+            self.shadow.reset()
+            if self.test_pattern:
                 screen.erase()
                 screen.refresh()
         if args.test_mode:
-            char = color_name[0]
-            cycle_change = 3
+            char = self.color_name[0]
+            self.cycle_change = 3
         else:
             char = " "
-        if test_pattern:
-            size_y, size_x = screen.getmaxyx()
-            if test_pattern == 1:
-                display_test_pattern1(screen, size_y, size_x, args.test_mode)
-            elif test_pattern == 2:
-                display_test_pattern2(screen, size_y, size_x, args.test_mode)
-            elif test_pattern == 3:
-                display_test_pattern3(screen, size_y, size_x, args.test_mode)
-        elif blue_screen:
-            size_y, size_x = screen.getmaxyx()
-            blue_screen_display(screen, size_y, size_x)
+        if self.idle and self.raw_output:
+            screen.clearok(True)
+            self.raw_output = False
+        if self.idle:
+            self.size_y, self.size_x = size_y, size_x = screen.getmaxyx()
+            # Nothing moves on these screens, only draw when they change.
+            screen_key = (self.test_pattern, self.blue_screen, size_y, size_x,
+                          args.test_mode)
+            if self.color_changed or screen_key != self.drawn_screen:
+                self.drawn_screen = screen_key
+                self.shadow.reset()
+                if self.test_pattern == 1:
+                    display_test_pattern1(screen, size_y, size_x,
+                                          args.test_mode, self.color_pairs)
+                elif self.test_pattern == 2:
+                    display_test_pattern2(screen, size_y, size_x,
+                                          args.test_mode, self.color_pairs)
+                elif self.test_pattern == 3:
+                    display_test_pattern3(screen, size_y, size_x,
+                                          args.test_mode, self.color_pairs)
+                else:
+                    blue_screen_display(screen, size_y, size_x,
+                                        self.color_pairs)
         else:
-            if color_changed:
-                [screen.addstr(y, x, char,
-                               curses.color_pair(random.randint(1, num_of_pairs)))
-                 for y in range(size_y) for x in range(size_x - 1)]
+            size_y, size_x = self.size_y, self.size_x
+            self.drawn_screen = None
+            frame_start = self.scheduler.clock()
+            self.frame_number += 1
+            if self.color_changed:
+                self.shadow.reset()
+                frame = self.make_frame(self.frame_number, size_y, size_x - 1,
+                                        self.weights)
             else:
-                [screen.addstr(
-                    random.randint(0, size_y - 1),
-                    random.randint(0, size_x - 2),
-                    char,
-                    curses.color_pair(random.randint(1, num_of_pairs)))
-                 for _ in range((size_y * (size_x - 1)) - 15)]
+                scale = self.governor.scale
+                if args.frame_cache:
+                    # The scale moves nearly every frame, round it up to a
+                    # few steps so cached frames are still reused.
+                    scale = math.ceil(scale * CACHED_SCALE_STEPS) / (
+                        CACHED_SCALE_STEPS)
+                count = int(((size_y * (size_x - 1)) - 15) * args.density
+                            * scale)
+                # Frames hold palette indexes, palettes with the same
+                # weights can reuse them.
+                key = (size_y, size_x, self.weights, count)
+                frame = self.frame_cache.get(key, self.frame_number, size_y,
+                                             size_x - 1, self.weights, count)
+            frame = self.shadow.diff(frame)
+            self.paint(screen, frame, size_x - 1, char, self.attrs)
+            self.raw_output = self.paint is paint_frame_ansi
         screen.refresh()
-        time.sleep(DELAY_SPEED[args.delay])
-        if args.run_timer and datetime.datetime.now() >= end_time:
-            break
-        color_changed = False
-        if args.cycle_color_mode and cycle_time >= cycle_change:
-            if cycle_color == len(LIST_OF_COLORS) - 1:
-                cycle_color = 0
-            else:
-                cycle_color += 1
-            color_name = LIST_OF_COLORS[cycle_color]
-            num_of_pairs = setup_curses_colors(color_name)
-            color_changed = True
-            cycle_time = 0
+        if args.adaptive and not (self.idle or self.color_changed):
+            self.governor.update(self.scheduler.clock() - frame_start,
+                                 self.scheduler.frame_time)
+        self.color_changed = False
+
+    def restart_cycle(self) -> None:
+        self.cycle_time = 0
+        self.cycle_start = self.scheduler.clock()
+
+    def cycle(self) -> None:
+        """ Moves on to the next color of the cycle. """
+        if self.cycle_color == len(LIST_OF_COLORS) - 1:
+            self.cycle_color = 0
         else:
-            cycle_time += 1
-        ch = screen.getch()
+            self.cycle_color += 1
+        self.set_color(LIST_OF_COLORS[self.cycle_color])
+        self.restart_cycle()
+
+    def handle_key(self, ch: int) -> None:
+        screen = self.screen
+        args = self.args
+        if self.frozen:
+            if ch == 102:  # f
+                self.frozen = False
+            elif ch == curses.KEY_RESIZE:
+                self.size_y, self.size_x = screen.getmaxyx()
+                self.color_changed = True
+            return
         if ch == curses.KEY_RESIZE:
-            size_y, size_x = screen.getmaxyx()
-            color_changed = True
+            self.size_y, self.size_x = screen.getmaxyx()
+            self.color_changed = True
         if ch == -1:
-            continue
+            return
         if args.screen_saver and ch != -1:
-            run = False
+            self.run = False
         elif args.disable_all_keys:
-            continue
+            return
         elif ch in [81, 113]:  # q Q
-            run = False
+            self.run = False
         elif args.disable_keys:
-            continue
+            return
         elif ch == 98:  # b
-            color_name = "all" if color_name == "B&W" else "B&W"
-            num_of_pairs = setup_curses_colors(color_name)
-            color_changed = True
+            self.set_color("all" if self.color_name == "B&W" else "B&W")
             args.cycle_color_mode = False
             args.additive = False
         elif ch == 67:  # C
-            color_name = "all"
-            num_of_pairs = setup_curses_colors(color_name)
-            color_changed = True
+            self.set_color("all")
             args.additive = False
             args.cycle_color_mode = False
         elif ch in [100, 68]:  # d or D
-            color_name = "all"
-            num_of_pairs = setup_curses_colors(color_name)
-            test_pattern = 0
-            color_changed = True
+            self.set_color("all")
+            self.test_pattern = 0
             args.delay = DEFAULT_SPEED
+            args.fps = None
+            args.density = DEFAULT_DENSITY
             args.cycle_color_mode = False
-            cycle_change = CYCLE_COLOR_SPEED[3]
+            self.cycle_change = CYCLE_COLOR_SPEED[3]
             args.additive = False
         elif 48 <= ch <= 57:  # number keys 1 to 0
             args.delay = int(chr(ch))
+            args.fps = None
+        elif ch in [43, 61]:  # + or =
+            args.density = min(1.0, round(args.density + DENSITY_STEP, 2))
+        elif ch == 45 and args.density > DENSITY_STEP:  # -
+            args.density = max(DENSITY_STEP,
+                               round(args.density - DENSITY_STEP, 2))
         elif ch in [114, 116, 121, 117, 105, 111] and args.additive:
             c = CURSES_CODES_COLORS[ch]
-            if c in additive_list:
-                additive_list.pop(additive_list.index(c))
+            if c in self.additive_list:
+                self.additive_list.pop(self.additive_list.index(c))
             else:
-                additive_list.append(c)
-            num_of_pairs = setup_curses_colors_additive(additive_list)
-            color_changed = True
+                self.additive_list.append(c)
+            self.set_pairs(self.additive_list)
         elif ch in [114, 116, 121, 117, 105, 111]:  # r, t, y, u, i, o
-            color_name = CURSES_CODES_COLORS[ch]
-            num_of_pairs = setup_curses_colors(color_name)
-            color_changed = True
+            self.set_color(CURSES_CODES_COLORS[ch])
             args.cycle_color_mode = False
             args.additive = False
         elif ch == 99:  # c
             if args.cycle_color_mode:
                 args.cycle_color_mode = False
-                color_name = "all"
-                num_of_pairs = setup_curses_colors(color_name)
-                color_changed = True
-                cycle_change = CYCLE_COLOR_SPEED[3]
+                self.set_color("all")
+                self.cycle_change = CYCLE_COLOR_SPEED[3]
             else:
                 args.cycle_color_mode = True
-                cycle_color = cycle_time = 0
-                color_name = LIST_OF_COLORS[cycle_color]
-                num_of_pairs = setup_curses_colors(color_name)
-                color_changed = True
+                self.cycle_color = 0
+                self.restart_cycle()
+                self.set_color(LIST_OF_COLORS[self.cycle_color])
                 args.additive = False
         elif ch in [33, 64, 35, 36, 37] and args.cycle_color_mode:
-            cycle_change = CYCLE_COLOR_SPEED[CURSES_NUM_SHIFT_CODES[ch] - 1]
+            self.cycle_change = CYCLE_COLOR_SPEED[
+                CURSES_NUM_SHIFT_CODES[ch] - 1]
         elif ch == 97:  # a
             if args.additive:
                 args.additive = False
-                color_name = "all"
-                num_of_pairs = setup_curses_colors(color_name)
-                color_changed = True
+                self.set_color("all")
             else:
-                color_name = "Add"
+                self.color_name = "Add"
                 args.additive = True
                 args.cycle_color_mode = False
-                additive_list = ["B&W"]
-                num_of_pairs = setup_curses_colors_additive(additive_list)
-                color_changed = True
+                self.additive_list = ["B&W"]
+                self.set_pairs(self.additive_list)
         elif ch == 108:  # l
+            self.shadow.reset()
             screen.erase()
+            screen.clearok(self.raw_output)
+            self.raw_output = False
             screen.refresh()
-            time.sleep(2)
+            self.hold = 2
         elif ch == 122:  # z
-            if test_pattern == NUMBER_OF_TEST_PATTERNS:
-                test_pattern = 0
-                num_of_pairs = setup_curses_colors(color_name)
+            if self.test_pattern == NUMBER_OF_TEST_PATTERNS:
+                self.test_pattern = 0
             else:
-                test_pattern += 1
+                self.test_pattern += 1
         elif ch == 119:  # w
-            if blue_screen == 1:
-                blue_screen = 0
+            if self.blue_screen == 1:
+                self.blue_screen = 0
                 screen.erase()
                 screen.refresh()
-                num_of_pairs = setup_curses_colors(color_name)
             else:
-                blue_screen += 1
-
+                self.blue_screen += 1
         elif ch == 102:  # f
-            while True:
+            self.frozen = True
+
+    def close(self) -> None:
+        if self.producer:
+            self.producer.stop()
+        if self.frame_pool:
+            self.frame_pool.stop()
+        # clear the screen before exit
+        self.screen.erase()
+        self.screen.clearok(self.raw_output)
+        self.screen.refresh()
+
+
+def static(screen, args: argparse.Namespace) -> StaticSession:
+    """ Main curses window. Returns the session for what it counted. """
+    scheduler = FrameScheduler(frame_time(args), args.run_timer)
+    session = StaticSession(screen, args, scheduler)
+    events = None
+    if args.benchmark:
+        scheduler.sleep = lambda seconds: None
+    elif hasattr(signal, "SIGWINCH"):
+        try:
+            events = TerminalEvents()
+        except ValueError:
+            pass  # not on the main thread, sleep and poll getch() instead
+        else:
+            scheduler.sleep = events.wait
+    try:
+        while session.run:
+            session.draw()
+            idle = session.idle
+            if not idle:
+                scheduler.frame_time = frame_time(args)
+                scheduler.wait()
+            if scheduler.expired():
+                break
+            if (args.cycle_color_mode and not idle
+                    and session.cycle_time >= session.cycle_change):
+                session.cycle()
+            else:
+                session.cycle_time += 1
+            if idle:
+                ch = wait_for_key(screen, scheduler.time_left(), events)
+            else:
                 ch = screen.getch()
-                if ch == 102:
+            session.handle_key(ch)
+            if session.hold:
+                time.sleep(session.hold)
+                session.hold = 0
+            while session.frozen:
+                session.handle_key(wait_for_key(screen, scheduler.time_left(),
+                                                events))
+                if session.frozen and scheduler.expired():
+                    session.run = False
                     break
-    # clear the screen before exit
-    screen.erase()
-    screen.refresh()
+    finally:
+        if events:
+            events.close()
+        session.close()
+    return session
+
+
+async def static_async(screen, args: argparse.Namespace) -> None:
+    """
+    static() as asyncio tasks for drawing, keys, the color cycle and the
+    run timer, all timed by the event loop's clock. Can be awaited from
+    inside an already running loop with a screen from curses.initscr(),
+    main() runs it with asyncio.run() for --asyncio.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    scheduler = FrameScheduler(frame_time(args), clock=loop.time)
+    session = StaticSession(screen, args, scheduler)
+    changed = asyncio.Event()  # set and cleared at once after each key
+    readable = asyncio.Event()
+    stop_polling = threading.Event()
+
+    def notify() -> None:
+        changed.set()
+        changed.clear()
+
+    async def wait_for_change(timeout: Optional[float]) -> bool:
+        """ Returns True when woken by a change before the timeout. """
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def render() -> None:
+        while session.run:
+            if session.hold:
+                await asyncio.sleep(session.hold)
+                session.hold = 0
+            if not session.frozen:
+                session.draw()
+            if session.idle or session.frozen:
+                await wait_for_change(None)
+                continue
+            scheduler.frame_time = frame_time(args)
+            delay = scheduler.deadline - scheduler.clock()
+            if delay > 0 and await wait_for_change(delay):
+                continue
+            scheduler.advance(delay)
+
+    async def keys() -> None:
+        while session.run:
+            await readable.wait()
+            readable.clear()
+            ch = screen.getch()
+            while ch != -1 and session.run:
+                session.handle_key(ch)
+                ch = screen.getch()
+            notify()
+
+    async def cycle_colors() -> None:
+        while session.run:
+            due = session.cycle_start + session.cycle_change * frame_time(args)
+            delay = due - loop.time()
+            if (delay <= 0 and args.cycle_color_mode and not session.idle
+                    and not session.frozen):
+                session.cycle()
+                notify()
+            else:
+                await wait_for_change(delay if delay > 0 else None)
+
+    async def run_timer() -> None:
+        await asyncio.sleep(args.run_timer)
+        session.run = False
+
+    def resized() -> None:
+        resize_terminal()
+        readable.set()
+
+    def poll_keys() -> None:
+        while not stop_polling.wait(KEY_POLL_TIME):
+            loop.call_soon_threadsafe(readable.set)
+
+    fd = sys.stdin.fileno()
+    key_thread = None
+    try:
+        loop.add_reader(fd, readable.set)
+    except NotImplementedError:
+        # Loops that can't watch stdin, like the Windows proactor loop,
+        # have a thread wake keys() to check for keys instead.
+        key_thread = threading.Thread(target=poll_keys, daemon=True)
+        key_thread.start()
+    watching_resize = False
+    if hasattr(signal, "SIGWINCH"):
+        try:
+            loop.add_signal_handler(signal.SIGWINCH, resized)
+            watching_resize = True
+        except (NotImplementedError, RuntimeError):
+            pass
+    tasks = [loop.create_task(render()), loop.create_task(keys()),
+             loop.create_task(cycle_colors())]
+    if args.run_timer:
+        tasks.append(loop.create_task(run_timer()))
+    try:
+        done, pending = await asyncio.wait(
+            tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if key_thread:
+            stop_polling.set()
+            key_thread.join()
+        else:
+            loop.remove_reader(fd)
+        if watching_resize:
+            loop.remove_signal_handler(signal.SIGWINCH)
+        session.close()
+
+
+def run_static_async(screen, args: argparse.Namespace) -> None:
+    """ Runs static_async() on a new event loop. """
+    import asyncio
+    asyncio.run(static_async(screen, args))
+
+
+class NullScreen:
+    """
+    Screen for running static() without a terminal. Timing starts at the
+    first refresh() and every getch() ends a frame, recording its time
+    and the number of calls made during it. getch() presses q once all
+    the frames are done.
+    """
+
+    def __init__(self, size_y: int, size_x: int, frames: int) -> None:
+        self.size_y = size_y
+        self.size_x = size_x
+        self.frames = frames
+        self.calls = 0
+        self.frame_times: List[float] = []
+        self.frame_calls: List[int] = []
+        self.frame_start: Optional[float] = None
+
+    def getmaxyx(self) -> Tuple[int, int]:
+        return self.size_y, self.size_x
+
+    def addstr(self, *args) -> None:
+        self.calls += 1
+
+    def erase(self) -> None:
+        self.calls += 1
+
+    def clearok(self, flag: bool) -> None:
+        self.calls += 1
+
+    def timeout(self, delay: int) -> None:
+        pass
+
+    def refresh(self) -> None:
+        self.calls += 1
+        if self.frame_start is None:
+            self.frame_start = time.perf_counter()
+            self.calls = 0
+
+    def getch(self) -> int:
+        if len(self.frame_times) >= self.frames:
+            return 113  # q
+        now = time.perf_counter()
+        self.frame_times.append(now - self.frame_start)
+        self.frame_calls.append(self.calls)
+        self.frame_start = now
+        self.calls = 0
+        return -1
+
+
+class HeadlessCurses:
+    """
+    Stands in for the curses module while static() runs on a NullScreen.
+    Calls that need a terminal are counted on the screen, everything else
+    comes from the real module.
+    """
+
+    def __init__(self, module, screen: NullScreen, colors: int) -> None:
+        self.module = module
+        self.screen = screen
+        self.COLORS = colors
+        self.pairs = {}
+
+    def __getattr__(self, name: str):
+        return getattr(self.module, name)
+
+    def curs_set(self, visibility: int) -> None:
+        pass
+
+    def use_default_colors(self) -> None:
+        pass
+
+    def is_term_resized(self, nlines: int, ncols: int) -> bool:
+        return False
+
+    def init_pair(self, pair: int, fg: int, bg: int) -> None:
+        self.screen.calls += 1
+        self.pairs[pair] = (fg, bg)
+
+    def pair_content(self, pair: int) -> Tuple[int, int]:
+        return self.pairs[pair]
+
+    def color_pair(self, pair: int) -> int:
+        self.screen.calls += 1
+        return pair << 8
+
+    def pair_number(self, attr: int) -> int:
+        return attr >> 8 & 0xff
+
+
+@contextlib.contextmanager
+def headless_curses(screen: NullScreen, colors: int = 256):
+    """ Swaps this module's curses for a HeadlessCurses. """
+    global curses
+    real_curses = curses
+    curses = HeadlessCurses(real_curses, screen, colors)
+    try:
+        yield curses
+    finally:
+        curses = real_curses
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[round(percent / 100 * (len(ordered) - 1))]
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """
+    Runs static() on a NullScreen with no sleeping for args.benchmark
+    frames and returns the timings.
+    """
+    size_y, size_x = args.benchmark_size
+    screen = NullScreen(size_y, size_x, args.benchmark)
+    args.disable_all_keys = False
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull), headless_curses(screen):
+        session = static(screen, args)
+    frame_times = screen.frame_times
+    return {
+        "frames": len(frame_times),
+        "size": f"{size_x}x{size_y}",
+        "fps": len(frame_times) / sum(frame_times),
+        "p50": percentile(frame_times, 50),
+        "p95": percentile(frame_times, 95),
+        "p99": percentile(frame_times, 99),
+        "max": max(frame_times),
+        "calls_per_frame": sum(screen.frame_calls) / len(frame_times),
+        "cells_per_frame": session.shadow.written / len(frame_times),
+        "redundant_per_frame": session.shadow.redundant / len(frame_times),
+    }
+
+
+def print_benchmark(results: dict) -> None:
+    print(f"Benchmark: {results['frames']} frames at {results['size']}")
+    print(f" frames/sec:             {results['fps']:.1f}")
+    print(" frame time ms:          "
+          + "  ".join(f"{name} {results[name] * 1000:.3f}"
+                      for name in ("p50", "p95", "p99", "max")))
+    print(f" curses calls per frame: {results['calls_per_frame']:.1f}")
+    print(f" cells written a frame:  {results['cells_per_frame']:.1f}")
+    print(f" redundant writes saved: {results['redundant_per_frame']:.1f}"
+          " a frame")
 
 
 def positive_int_zero_to_nine(value: str) -> int:
@@ -434,6 +1578,48 @@ def pos_int(value: str) -> int:
             return int_value
 
 
+def density_type(value: str) -> float:
+    """ Used with argparse. Fraction of cells above 0 and up to 1. """
+    error_msg = f"{value} is an invalid density. Use above 0 up to 1"
+    try:
+        float_value = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(error_msg)
+    if not 0 < float_value <= 1:
+        raise argparse.ArgumentTypeError(error_msg)
+    return float_value
+
+
+def terminal_size(value: str) -> Tuple[int, int]:
+    """
+    Used with argparse. Converts COLUMNSxROWS, for example 80x24,
+    into (rows, columns) like screen.getmaxyx().
+    """
+    error_msg = f"{value} is an invalid size. Use COLUMNSxROWS e.g. 80x24"
+    try:
+        columns, rows = (int(n) for n in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(error_msg)
+    if columns < 2 or rows < 1:
+        raise argparse.ArgumentTypeError(error_msg)
+    return rows, columns
+
+
+class VersionAction(argparse.Action):
+    """ Used with argparse. Prints the version, only looked up when asked. """
+
+    def __init__(self, option_strings: Sequence[str],
+                 dest: str = argparse.SUPPRESS,
+                 help: str = "show program's version number and exit"
+                 ) -> None:
+        super().__init__(option_strings, dest, nargs=0,
+                         default=argparse.SUPPRESS, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None) -> None:
+        print(get_version())
+        parser.exit()
+
+
 def list_commands() -> None:
     print("List of running commands:")
     print(" Q or q           To quit")
@@ -445,6 +1631,7 @@ def list_commands() -> None:
     print(" d                Reset to default settings")
     print(f" 0 - 9            Delay. 0-Fast, {DEFAULT_SPEED}-Default, 9-Slow")
     print(" shift 1 - 5      Color cycle time. 1-Fast, 3-Default, 5-Slow")
+    print(" + or -           More or less of the screen changes each frame")
     print(" r,t,y,u,i,o,p,[  Set single color")
     print(" f                Freeze screen until 'f' is pressed again.")
     print(" l                Clear the screen wait 2 seconds and start again")
@@ -460,11 +1647,19 @@ def list_colors() -> None:
 
 def argument_parser(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     """ Command line argument setup and parsing by argparse. """
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(usage="%(prog)s [options]")
     parser.add_argument("-d", dest="delay", default=DEFAULT_SPEED,
                         type=positive_int_zero_to_nine,
                         help="Delay setting (speed):  "
                              f"0-Fast, {DEFAULT_SPEED}-Default, 9-Slow")
+    parser.add_argument("--fps", type=pos_int, default=None,
+                        help="Frames per second. Overrides -d")
+    parser.add_argument("--density", type=density_type,
+                        default=DEFAULT_DENSITY, metavar="FRACTION",
+                        help="Share of the screen changed each frame. "
+                             "Default 1")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Update fewer cells when frames run long")
     parser.add_argument("-b", dest="black_white", action="store_true",
                         help="Enable black and white mode. Overrides -C")
     parser.add_argument("-C", "--color", type=color_type, default=None,
@@ -489,14 +1684,47 @@ def argument_parser(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
                         help="Disable all keys while running including "
                              "'Q' and 'q.'"
                         "Use ctrl-c to quit. Does not affect screensaver mode.")
+    parser.add_argument("--asyncio", action="store_true",
+                        help="Run on an asyncio event loop")
+    parser.add_argument("--engine", choices=list(ENGINES), default="python",
+                        metavar="ENGINE",
+                        help="Frame generator: python (default) or numpy")
+    parser.add_argument("--renderer", choices=list(RENDERERS),
+                        default="curses", metavar="RENDERER",
+                        help="Renderer: curses (default) or ansi")
+    parser.add_argument("--frame_cache", type=pos_int, default=0,
+                        metavar="FRAMES",
+                        help="Generate FRAMES frames once and reuse them")
+    parser.add_argument("--threaded", action="store_true",
+                        help="Generate frames on a background thread")
+    parser.add_argument("--workers", type=pos_int, default=0,
+                        metavar="PROCS",
+                        help="Generate frames across worker processes")
+    parser.add_argument("--seed", type=int, metavar="N",
+                        help="Same N, same frames. Not with --adaptive")
+    parser.add_argument("--rng", choices=list(RNGS), default="mt",
+                        metavar="RNG",
+                        help="Frame RNG: mt (default) or pcg64 with numpy")
+    parser.add_argument("--test_pattern", type=int, default=0,
+                        choices=range(1, NUMBER_OF_TEST_PATTERNS + 1),
+                        metavar="N", help="Start on test pattern 1, 2 or 3")
+    parser.add_argument("--benchmark", type=pos_int, default=0,
+                        metavar="FRAMES",
+                        help="Time FRAMES frames without a terminal")
+    parser.add_argument("--benchmark_size", type=terminal_size,
+                        default=(24, 80), metavar="WxH",
+                        help="Screen size for --benchmark. Default 80x24")
     parser.add_argument("--list_colors", action="store_true",
                         help="List available colors and exit.")
     parser.add_argument("--list_commands", action="store_true",
                         help="List running commands and exit.")
-    parser.add_argument("--version", action="version", version=VERSION)
+    parser.add_argument("--version", action=VersionAction)
     parser.add_argument("--test_mode", action="store_true",
                         help=argparse.SUPPRESS)
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    if args.benchmark and args.asyncio:
+        parser.error("--benchmark can't be used with --asyncio")
+    return args
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
@@ -507,10 +1735,16 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     elif args.list_colors:
         list_colors()
         return 0
+    elif args.benchmark:
+        print_benchmark(run_benchmark(args))
+        return 0
 
     time.sleep(args.start_timer)
     try:
-        curses.wrapper(static, args)
+        if args.asyncio:
+            curses.wrapper(run_static_async, args)
+        else:
+            curses.wrapper(static, args)
     except KeyboardInterrupt:
         pass
     return 0
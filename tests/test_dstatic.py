@@ -1,6 +1,15 @@
 """ Test file for dstatic.py script. """
 
 from unittest import mock
+import asyncio
+import functools
+import os
+import pickle
+import random
+import signal
+import subprocess
+import sys
+import threading
 import time
 
 import pytest
@@ -8,6 +17,8 @@ from hecate import Runner
 
 from dstatic import dstatic
 
+NINE = (1,) * 9  # weights of nine equally likely palette indexes
+
 
 def dstatic_cmd(*args):
     options = [a for a in args]
@@ -15,8 +26,8 @@ def dstatic_cmd(*args):
 
 
 @pytest.mark.parametrize("color, expected", [
-    ("all", 11), ("B&W", 20), ("red", 9), ("green", 10), ("blue", 10),
-    ("yellow", 9), ("cyan", 9), ("magenta", 9)
+    ("all", 11), ("B&W", 20), ("red", 6), ("green", 6), ("blue", 6),
+    ("yellow", 6), ("cyan", 6), ("magenta", 6)
 ])
 def test_setup_colors_num_of_pairs(color, expected):
     dstatic.curses.initscr()
@@ -27,8 +38,8 @@ def test_setup_colors_num_of_pairs(color, expected):
 
 
 @pytest.mark.parametrize("color, expected", [
-    ("all", 8), ("B&W", 8), ("red", 7), ("green", 7), ("blue", 7),
-    ("yellow", 7), ("cyan", 7), ("magenta", 7)
+    ("all", 8), ("B&W", 2), ("red", 3), ("green", 3), ("blue", 3),
+    ("yellow", 3), ("cyan", 3), ("magenta", 3)
 ])
 def test_setup_colors_num_of_pairs_8_colors(color, expected):
     dstatic.curses.initscr()
@@ -39,10 +50,10 @@ def test_setup_colors_num_of_pairs_8_colors(color, expected):
 
 
 @pytest.mark.parametrize("color, expected", [
-    ("cyan", [(23, 23), (30, 30), (44, 44), (51, 51), (44, 44)]),
-    ("all", [(16, 16), (255, 255), (40, 40), (184, 184), (164, 164)]),
-    ("B&W", [(16, 16), (232, 232), (234, 234), (236, 236), (237, 237)]),
-    ("yellow", [(58, 58), (94, 94), (106, 106), (184, 184), (184, 184)]),
+    ("cyan", [(23, 23), (30, 30), (44, 44), (51, 51)]),
+    ("all", [(16, 16), (255, 255), (40, 40), (184, 184)]),
+    ("B&W", [(16, 16), (232, 232), (234, 234), (236, 236)]),
+    ("yellow", [(58, 58), (94, 94), (106, 106), (184, 184)]),
 ])
 def test_setup_curses_colors(color, expected):
     dstatic.curses.initscr()
@@ -57,15 +68,13 @@ def test_setup_curses_colors(color, expected):
         assert result == (expected[2])
         result = dstatic.curses.pair_content(6)
         assert result == (expected[3])
-        result = dstatic.curses.pair_content(7)
-        assert result == (expected[4])
 
 
 @pytest.mark.parametrize("color, expected", [
-    ("cyan", [(6, 6), (6, 6), (6, 6), (7, 7), (0, 0)]),
-    ("all", [(0, 0), (1, 1), (3, 3), (5, 5), (6, 6)]),
-    ("B&W", [(0, 0), (7, 7), (7, 7), (7, 7), (0, 0)]),
-    ("yellow", [(3, 3), (3, 3), (3, 3), (7, 7), (0, 0)]),
+    ("cyan", [(6, 6), (7, 7)]),
+    ("all", [(0, 0), (1, 1)]),
+    ("B&W", [(0, 0), (7, 7)]),
+    ("yellow", [(3, 3), (7, 7)]),
 ])
 def test_setup_curses_colors_8_colors(color, expected):
     dstatic.curses.initscr()
@@ -76,18 +85,13 @@ def test_setup_curses_colors_8_colors(color, expected):
         assert result == (expected[0])
         result = dstatic.curses.pair_content(2)
         assert result == (expected[1])
-        result = dstatic.curses.pair_content(4)
-        assert result == (expected[2])
-        result = dstatic.curses.pair_content(6)
-        assert result == (expected[3])
-        result = dstatic.curses.pair_content(7)
-        assert result == (expected[4])
 
 
 @pytest.mark.parametrize("color_list, expected", [
-    (["B&W", "blue"], 30),
-    (["B&W", "yellow", "red", "magenta"], 47),
-    (["B&W", "red", "green", "blue", "yellow", "magenta", "cyan"], 76)
+    (["B&W", "blue"], 26),
+    (["B&W", "yellow", "red", "magenta"], 38),
+    (["B&W", "red", "green", "blue", "yellow", "magenta", "cyan"], 56),
+    (["red", "all"], 15)
 ])
 def test_setup_curses_colors_additive_num_of_pairs(color_list, expected):
     dstatic.curses.initscr()
@@ -98,9 +102,9 @@ def test_setup_curses_colors_additive_num_of_pairs(color_list, expected):
 
 
 @pytest.mark.parametrize("color_list, expected", [
-    (["B&W", "blue"], 15),
-    (["B&W", "yellow", "red", "magenta"], 29),
-    (["B&W", "red", "green", "blue", "yellow", "magenta", "cyan"], 50)
+    (["B&W", "blue"], 3),
+    (["B&W", "yellow", "red", "magenta"], 5),
+    (["B&W", "red", "green", "blue", "yellow", "magenta", "cyan"], 8)
 ])
 def test_setup_curses_colors_additive_num_of_pairs_8_colors(color_list,
                                                             expected):
@@ -125,10 +129,781 @@ def test_setup_curses_colors_additive_8_colors():
     dstatic.curses.initscr()
     dstatic.curses.start_color()
     with mock.patch.object(dstatic.curses, "COLORS", 8):
-        dstatic.setup_curses_colors_additive(["B&W", "red"])
+        assert dstatic.setup_curses_colors_additive(["B&W", "red"]) == 3
         assert dstatic.curses.pair_content(1) == (0, 0)
-        assert dstatic.curses.pair_content(9) == (1, 1)
-        assert dstatic.curses.pair_content(15) == (0, 0)
+        assert dstatic.curses.pair_content(2) == (7, 7)
+        assert dstatic.curses.pair_content(3) == (1, 1)
+
+
+def test_color_pairs():
+    screen = dstatic.NullScreen(24, 80, 0)
+    with dstatic.headless_curses(screen) as curses:
+        color_pairs = dstatic.ColorPairs()
+        init_calls = screen.calls
+        red, red_weights = color_pairs.palette(["red"])
+        assert [(curses.pairs[pair], weight) for pair, weight in zip(
+            red, red_weights)] == [((c, c), weight)
+                                   for c, weight in dstatic.COLORS["red"]]
+        assert color_pairs.palette(["red"]) is color_pairs.palette(("red",))
+        bw, bw_weights = color_pairs.palette(["B&W"])
+        assert color_pairs.palette(["B&W", "red"]) == (
+            bw + red, bw_weights + red_weights)
+        pairs, weights = color_pairs.palette(["red", "all"])
+        assert pairs[:6] == red and len(pairs) == len(set(pairs)) == 15
+        assert weights[3] == 3 + 1  # 160 is in both
+        assert color_pairs.pair(16, 16) == color_pairs.palette(["all"])[0][0]
+        assert color_pairs.attrs(red) == (0,) + tuple(
+            pair << 8 for pair in red)
+        assert color_pairs.attr(160, 160) == red[3] << 8
+        assert screen.calls == init_calls
+    colors = set(c for name, color_list in dstatic.COLORS.items()
+                 if not name.endswith(" 8") for c, _ in color_list)
+    assert init_calls == len(colors) * 2  # init_pair and color_pair
+
+
+def test_color_pairs_8_colors():
+    screen = dstatic.NullScreen(24, 80, 0)
+    with dstatic.headless_curses(screen, 8) as curses:
+        color_pairs = dstatic.ColorPairs()
+        assert [curses.pairs[pair] for pair in color_pairs.palette(
+            ["red"])[0]] == [(c, c) for c, _ in dstatic.COLORS["red 8"]]
+    assert len(curses.pairs) == 8
+
+
+@pytest.mark.parametrize("num_of_pairs", [1, 7, 11, 20, 76])
+def test_random_pairs(num_of_pairs):
+    result = dstatic.random_pairs((1,) * num_of_pairs, 5000)
+    assert len(result) == 5000
+    assert set(result) == set(range(1, num_of_pairs + 1))
+
+
+@pytest.mark.parametrize("weights", [(1,), (2, 1, 1), (1, 5, 1, 1), (4, 4),
+                                     (1, 1, 2, 3, 1, 1), (30, 200, 26)])
+def test_pair_table(weights):
+    table, delete = dstatic.pair_table(weights)
+    kept = table[:256 - len(delete)]
+    assert len(kept) % sum(weights) == 0
+    for index, weight in enumerate(weights, start=1):
+        assert kept.count(index) == weight * len(kept) // sum(weights)
+
+
+@pytest.mark.parametrize("weights", [(200, 57), (1,) * 300, ()])
+def test_pair_table_weights_error(weights):
+    with pytest.raises(ValueError):
+        dstatic.pair_table(weights)
+    with pytest.raises(ValueError):
+        dstatic.random_pairs(weights, 10)
+
+
+def test_random_pairs_weights():
+    result = dstatic.random_pairs((1, 3), 40000)
+    assert 9000 < result.count(1) < 11000
+    assert result.count(1) + result.count(2) == 40000
+
+
+def test_generate_frame_full():
+    result = dstatic.generate_frame(10, 20, NINE)
+    assert (result.height, result.width) == (10, 20)
+    assert len(result) == 200
+    assert 0 not in result
+    assert max(result) <= 9
+
+
+def test_frame():
+    frame = dstatic.Frame(2, 3, b"abcdef")
+    assert (frame.height, frame.width) == (2, 3)
+    assert frame.row(1) == b"def"
+    frame.row(0)[1] = ord("x")
+    assert frame == b"axcdef"
+    copy = pickle.loads(pickle.dumps(frame))
+    assert (copy, copy.height, copy.width) == (frame, 2, 3)
+    assert dstatic.Frame(2, 3) == bytes(6)
+
+
+def test_generate_frame_count():
+    result = dstatic.generate_frame(10, 20, NINE, 150)
+    assert len(result) == 200
+    assert 50 <= result.count(0) < 200
+    assert max(result) <= 9
+
+
+def test_generate_frame_count_zero():
+    assert dstatic.generate_frame(10, 20, NINE, 0) == bytearray(200)
+
+
+@pytest.mark.parametrize("count", [None, 150])
+def test_generate_frame_numpy(count):
+    pytest.importorskip("numpy")
+    result = dstatic.generate_frame_numpy(10, 20, NINE, count)
+    assert isinstance(result, dstatic.Frame)
+    assert (result.height, result.width) == (10, 20)
+    assert len(result) == 200
+    assert set(result) - {0} == set(range(1, 10))
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_seed_frames(engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    generate = dstatic.ENGINES[engine]
+    frames = []
+    for _ in range(2):
+        dstatic.seed_frames(5)
+        frames.append([generate(10, 20, NINE), generate(10, 20, NINE, 50)])
+    assert frames[0] == frames[1]
+    dstatic.seed_frames(6)
+    assert generate(10, 20, NINE) != frames[0][0]
+    dstatic.seed_frames()
+
+
+def test_frame_rng():
+    first = dstatic.frame_rng(random.Random, 5, 1).getrandbits(64)
+    assert dstatic.frame_rng(random.Random, 5, 1).getrandbits(64) == first
+    assert dstatic.frame_rng(random.Random, 5, 2).getrandbits(64) != first
+    assert dstatic.frame_rng(random.Random, 6, 1).getrandbits(64) != first
+
+
+def test_pcg64_random():
+    pytest.importorskip("numpy")
+    rng = dstatic.PCG64Random(5)
+    values = [rng.getrandbits(k) for k in [1, 7, 8, 9, 64, 1000]]
+    assert all(0 <= value < 2 ** k
+               for value, k in zip(values, [1, 7, 8, 9, 64, 1000]))
+    assert dstatic.PCG64Random(5).getrandbits(1000) == (
+        dstatic.PCG64Random(5).getrandbits(1000))
+    frame = dstatic.generate_frame(10, 20, NINE, rng=rng)
+    assert set(frame) == set(range(1, 10))
+
+
+def test_get_rng_numpy_fallback():
+    with mock.patch.object(dstatic, "numpy", None), \
+            mock.patch.dict(sys.modules, {"numpy": None}):
+        assert dstatic.get_rng("pcg64") is random.Random
+
+
+def test_get_engine_numpy_fallback():
+    with mock.patch.object(dstatic, "numpy", None), \
+            mock.patch.dict(sys.modules, {"numpy": None}):
+        assert dstatic.get_engine("numpy") is dstatic.generate_frame
+
+
+def test_import_defers_slow_modules():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import dstatic.dstatic"],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    # Modules already imported aren't listed, the ones after the dstatic
+    # package up to dstatic.dstatic are the ones importing it costs.
+    modules = [line.split("|")[-1].strip()
+               for line in result.stderr.splitlines()]
+    start = len(modules) - modules[::-1].index("dstatic")
+    imported = modules[start:modules.index("dstatic.dstatic")]
+    for module in ("numpy", "asyncio", "multiprocessing",
+                   "importlib.metadata", "importlib_metadata"):
+        assert module not in imported
+
+
+def test_paint_frame_runs():
+    screen = mock.Mock()
+    frame = bytearray([1, 1, 2, 0, 2, 2,
+                       3, 3, 3, 3, 0, 0])
+    dstatic.paint_frame(screen, frame, 6, "a", (0, 10, 20, 30))
+    assert screen.addstr.call_args_list == [
+        mock.call(0, 0, "aa", 10), mock.call(0, 2, "a", 20),
+        mock.call(0, 4, "aa", 20), mock.call(1, 0, "aaaa", 30),
+    ]
+
+
+def test_nonzero_bytes():
+    value = int.from_bytes(bytes([0, 1, 128, 0, 255, 16]), "little")
+    ones = dstatic.byte_ones(6)
+    assert dstatic.nonzero_bytes(value, ones).to_bytes(6, "little") == (
+        bytes([0, 1, 1, 0, 1, 1]))
+
+
+def test_shadow_frame_diff():
+    shadow = dstatic.ShadowFrame()
+    assert shadow.diff(bytearray([1, 2, 3, 0])) == bytes([1, 2, 3, 0])
+    assert shadow.diff(bytearray([1, 1, 3, 2])) == bytes([0, 1, 0, 2])
+    assert shadow.cells == bytes([1, 1, 3, 2])
+    assert shadow.written == 5
+    assert shadow.redundant == 2
+    shadow.reset()
+    assert shadow.diff(bytearray([3, 0, 0, 0])) == bytes([3, 0, 0, 0])
+    assert shadow.cells == bytes([3, 0, 0, 0])
+
+
+def test_frame_cache():
+    generate = mock.Mock(side_effect=lambda n: bytearray([n]))
+    cache = dstatic.FrameCache(2, generate)
+    frames = [cache.get("key", n) for n in range(5)]
+    assert frames == [bytearray([0]), bytearray([1]), bytearray([0]),
+                      bytearray([1]), bytearray([0])]
+    assert generate.call_count == 2
+    assert cache.get("new key", 7) == bytearray([7])
+    assert generate.call_count == 3
+
+
+def test_frame_cache_disabled():
+    generate = mock.Mock(side_effect=lambda n: bytearray([n]))
+    cache = dstatic.FrameCache(0, generate)
+    assert [cache.get("key", n) for n in range(3)] == [
+        bytearray([0]), bytearray([1]), bytearray([2])]
+
+
+def test_frame_producer():
+    producer = dstatic.FrameProducer(lambda n, arg: bytearray([n, arg]))
+    assert producer.get(1, 7) == bytearray([1, 7])
+    assert producer.get(2, 7) == bytearray([2, 7])
+    assert producer.get(4, 7) == bytearray([4, 7])
+    assert producer.get(5, 8) == bytearray([5, 8])
+    assert producer.get(5, 8) == bytearray([5, 8])
+    producer.stop()
+    assert not producer.thread.is_alive()
+
+
+def test_frame_producer_error():
+    def generate(n):
+        if n == 2:
+            raise ValueError("no frame")
+        return bytearray([n])
+
+    producer = dstatic.FrameProducer(generate)
+    assert producer.get(1) == bytearray([1])
+    with pytest.raises(ValueError, match="no frame"):
+        producer.get(2)
+    assert producer.get(3) == bytearray([3])
+    producer.stop()
+    assert not producer.thread.is_alive()
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_frame_pool(engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    frame_pool = dstatic.FramePool(3, dstatic.ENGINES[engine])
+    try:
+        result = frame_pool.get(10, 20, NINE)
+        assert (result.height, result.width) == (10, 20)
+        assert len(result) == 200
+        assert 0 not in result
+        # Each band is generated with a seed of its own.
+        assert result[:60] != result[60:120]
+        result = frame_pool.get(10, 20, NINE, 150)
+        assert len(result) == 200
+        assert 50 <= result.count(0) < 200
+        assert frame_pool.get(4, 10, NINE) != bytearray(40)
+        dstatic.seed_frames(5)
+        result = frame_pool.get(10, 20, NINE)
+        dstatic.seed_frames(5)
+        assert frame_pool.get(10, 20, NINE) == result
+        dstatic.seed_frames()
+    finally:
+        frame_pool.stop()
+
+
+def test_static_session_threaded_workers():
+    screen = dstatic.NullScreen(10, 40, 0)
+    args = dstatic.argument_parser(["--threaded", "--workers", "2"])
+    repaints = []
+    with dstatic.headless_curses(screen) as curses:
+        session = dstatic.StaticSession(screen, args,
+                                        dstatic.FrameScheduler(0.1))
+        generate = session.generate
+
+        def repaint(*frame_args):
+            # Full frames are made here while the producer uses the pool.
+            frame = generate(*frame_args)
+            if frame_args[3] is None:
+                repaints.append((bytes(frame), len(session.weights)))
+            return frame
+
+        session.generate = repaint
+        try:
+            for key in [98] * 6 + [curses.KEY_RESIZE] + [98] * 6:  # b
+                if key == curses.KEY_RESIZE:
+                    screen.size_y, screen.size_x = 20, 80
+                session.handle_key(key)
+                for _ in range(3):
+                    session.draw()
+        finally:
+            session.close()
+    assert len(repaints) == 13
+    assert len(repaints[-1][0]) == 20 * 79
+    for frame, colors in repaints:
+        assert 0 not in frame
+        assert max(frame) <= colors
+
+
+def test_init_band_worker_ignores_ctrl_c():
+    handler = signal.getsignal(signal.SIGINT)
+    try:
+        dstatic._init_band_worker(bytearray(4), dstatic.generate_frame)
+        assert signal.getsignal(signal.SIGINT) is signal.SIG_IGN
+    finally:
+        signal.signal(signal.SIGINT, handler)
+
+
+def test_static_ctrl_c_closes_session():
+    screen = dstatic.NullScreen(10, 40, 5)
+    args = dstatic.argument_parser(["--benchmark", "5", "--threaded",
+                                    "--workers", "2"])
+    draw = dstatic.StaticSession.draw
+    close = dstatic.StaticSession.close
+
+    def draw_once(session):
+        if session.cycle_time:
+            raise KeyboardInterrupt
+        draw(session)
+
+    with dstatic.headless_curses(screen), \
+            mock.patch.object(dstatic.StaticSession, "draw", autospec=True,
+                              side_effect=draw_once), \
+            mock.patch.object(dstatic.StaticSession, "close", autospec=True,
+                              side_effect=close) as closed:
+        with pytest.raises(KeyboardInterrupt):
+            dstatic.static(screen, args)
+    session = closed.call_args[0][0]
+    assert not session.producer.thread.is_alive()
+    assert session.frame_pool.pool is None
+
+
+def session_frames(*options):
+    """ The frames a seeded session paints through a few color changes. """
+    screen = dstatic.NullScreen(10, 40, 0)
+    args = dstatic.argument_parser(["--seed", "7", "--density", "0.5",
+                                    *options])
+    frames = []
+    with dstatic.headless_curses(screen):
+        session = dstatic.StaticSession(screen, args,
+                                        dstatic.FrameScheduler(0.1))
+        session.paint = lambda screen, frame, *rest: frames.append(
+            bytes(frame))
+        try:
+            for key in [-1] * 4 + [98] + [-1] * 4 + [114] + [-1] * 4:  # b r
+                session.handle_key(key)
+                session.draw()
+        finally:
+            session.close()
+    return frames
+
+
+@pytest.mark.parametrize("options", [
+    [], ["--frame_cache", "2"], ["--workers", "2"], ["--engine", "numpy"],
+    ["--rng", "pcg64"],
+])
+def test_static_session_seed_threaded(options):
+    if "numpy" in options or "pcg64" in options:
+        pytest.importorskip("numpy")
+    frames = session_frames(*options)
+    assert len(frames) == 14
+    assert session_frames(*options, "--threaded") == frames
+    assert session_frames(*options, "--seed", "8") != frames
+
+
+def test_frame_scheduler_sleeps_remaining_time():
+    clock = mock.Mock(side_effect=[0.0, 0.03, 0.25])
+    sleep = mock.Mock(return_value=None)
+    scheduler = dstatic.FrameScheduler(0.1, 0, clock, sleep)
+    scheduler.wait()
+    assert sleep.call_args == mock.call(pytest.approx(0.07))
+    scheduler.wait()
+    assert sleep.call_count == 1
+    assert scheduler.deadline == pytest.approx(0.3)
+    assert scheduler.skipped == 0
+
+
+def test_frame_scheduler_skips_late_frames():
+    clock = mock.Mock(side_effect=[0.0, 0.35])
+    sleep = mock.Mock()
+    scheduler = dstatic.FrameScheduler(0.1, 0, clock, sleep)
+    scheduler.wait()
+    sleep.assert_not_called()
+    assert scheduler.skipped == 2
+    assert scheduler.deadline == pytest.approx(0.4)
+
+
+def test_frame_scheduler_run_timer():
+    clock = mock.Mock(side_effect=[10.0, 11.0, 11.0, 12.0])
+    scheduler = dstatic.FrameScheduler(0.1, 2, clock)
+    assert scheduler.time_left() == 1.0
+    assert not scheduler.expired()
+    assert scheduler.expired()
+
+
+def test_frame_scheduler_no_run_timer():
+    scheduler = dstatic.FrameScheduler(0.1)
+    assert scheduler.time_left() is None
+    assert not scheduler.expired()
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], 0.07), (["-d", "9"], 0.4), (["--fps", "50"], 0.02),
+    (["-d", "9", "--fps", "20"], 0.05),
+])
+def test_frame_time(test_values, expected_result):
+    args = dstatic.argument_parser(test_values)
+    assert dstatic.frame_time(args) == pytest.approx(expected_result)
+
+
+def test_quality_governor():
+    governor = dstatic.QualityGovernor()
+    governor.update(0.2, 0.1)
+    assert governor.scale == 0.5
+    governor.update(0.12, 0.1)
+    assert governor.scale == pytest.approx(0.5 / 1.2)
+    governor.update(0.09, 0.1)
+    assert governor.scale == pytest.approx(0.5 / 1.2)
+    governor.update(0.01, 0.1)
+    assert governor.scale == pytest.approx(0.5 / 1.2 + 0.05)
+
+
+def test_quality_governor_limits():
+    governor = dstatic.QualityGovernor(minimum=0.1)
+    governor.update(0.01, 0.1)
+    assert governor.scale == 1.0
+    for _ in range(10):
+        governor.update(1.0, 0.1)
+    assert governor.scale == 0.1
+
+
+def test_paint_frame_ansi():
+    frame = bytearray([1, 1, 2, 0, 2, 2,
+                       0, 0, 3, 3, 0, 0])
+    with mock.patch.object(dstatic.curses, "COLORS", 256), \
+            mock.patch.object(dstatic.curses, "pair_content",
+                              lambda pair: (pair, pair)), \
+            mock.patch.object(dstatic.curses, "pair_number",
+                              lambda attr: attr >> 8), \
+            mock.patch.object(dstatic.os, "write",
+                              side_effect=lambda fd, data: len(data)) as w:
+        dstatic.paint_frame_ansi(None, frame, 6, "a",
+                                 (0, 4 << 8, 5 << 8, 6 << 8))
+    assert bytes(w.call_args[0][1]) == (
+        b"\x1b[1;1H\x1b[38;5;4;48;5;4maa\x1b[38;5;5;48;5;5ma"
+        b"\x1b[1;5Haa\x1b[2;3H\x1b[38;5;6;48;5;6maa\x1b[0m"
+    )
+
+
+def test_paint_frame_ansi_8_colors():
+    with mock.patch.object(dstatic.curses, "COLORS", 8), \
+            mock.patch.object(dstatic.curses, "pair_content",
+                              lambda pair: (pair, pair)):
+        assert dstatic.ansi_pair_code(4) == b"\x1b[34;44m"
+
+
+@pytest.mark.parametrize("options", [
+    [], ["-b"], ["-c"], ["-a"], ["--test_pattern", "2"],
+    ["--renderer", "ansi"], ["--benchmark_size", "200x60"],
+])
+def test_run_benchmark(options):
+    args = dstatic.argument_parser(["--benchmark", "5"] + options)
+    result = dstatic.run_benchmark(args)
+    assert result["frames"] == 5
+    assert result["p50"] <= result["p95"] <= result["p99"] <= result["max"]
+    assert result["calls_per_frame"] > 0
+    assert result["redundant_per_frame"] >= 0
+    assert dstatic.curses.__name__ == "curses"
+
+
+def test_dstatic_benchmark(capsys):
+    return_value = dstatic.main(["--benchmark", "3", "--benchmark_size",
+                                 "40x10"])
+    captured_output = capsys.readouterr().out
+    assert "Benchmark: 3 frames at 40x10" in captured_output
+    assert "frames/sec:" in captured_output
+    assert "curses calls per frame:" in captured_output
+    assert "redundant writes saved:" in captured_output
+    assert return_value == 0
+
+
+def render_layout(segments, size_y, size_x):
+    rows = [[" "] * size_x for _ in range(size_y)]
+    for y, x, text, pair, bold in segments:
+        rows[y][x:x + len(text)] = text
+    return ["".join(row).rstrip() for row in rows]
+
+
+@pytest.mark.parametrize("pattern, size_y, size_x, expected", [
+    (1, 10, 30, ["wwwyyycccgggmmmrrrbbbBBB"] * 9 + [""]),
+    (2, 20, 30, ["wwwwyyyyccccggggmmmmrrrrbbbb"] * 18
+     + ["BBBBbbbbrrrrmmmmggggccccyyyy", ""]),
+    (3, 20, 42, ["wwwwwwyyyyyyccccccggggggmmmmmmrrrrrrbbbbbb"] * 14
+     + ["bbbbbbbbbbbbwwbbbbbbbbbbbb"] * 5 + [""]),
+])
+def test_test_pattern_layout(pattern, size_y, size_x, expected):
+    colors, segments = dstatic.test_pattern_layout(pattern, size_y, size_x,
+                                                   True, 8)
+    assert render_layout(segments, size_y, size_x) == expected
+    assert len(segments) == len(set((y, x) for y, x, *_ in segments))
+
+
+def test_test_pattern_layout_pairs():
+    colors, segments = dstatic.test_pattern_layout(3, 20, 42, False, 256)
+    assert colors[8] == 17
+    assert (11, 0, " " * 6, 1, False) in segments
+    assert (13, 0, " " * 6, 8, True) in segments
+    assert (14, 0, " " * 12, 9, False) in segments
+    assert (14, 12, " " * 2, 1, True) in segments
+
+
+def test_test_pattern_layout_cached():
+    first = dstatic.test_pattern_layout(1, 24, 80, False, 256)
+    assert dstatic.test_pattern_layout(1, 24, 80, False, 256) is first
+
+
+@pytest.mark.parametrize("size_y, size_x", [(23, 78), (40, 120), (5, 20)])
+def test_blue_screen_lines(size_y, size_x):
+    result = dstatic.blue_screen_lines(size_y, size_x)
+    assert len(result) == size_y
+    assert all(len(line) == size_x for line in result)
+    assert result[2].startswith("  A problem has been detected"[:size_x])
+
+
+def test_blue_screen_display():
+    screen = mock.Mock()
+    screen.addstr.side_effect = [None] * 22 + [dstatic.curses.error]
+    color_pairs = mock.Mock()
+    color_pairs.attr.return_value = 67
+    dstatic.blue_screen_display(screen, 23, 78, color_pairs)
+    color_pairs.attr.assert_called_once_with(dstatic.curses.COLOR_WHITE,
+                                             dstatic.curses.COLOR_BLUE)
+    assert screen.addstr.call_count == 23
+    assert screen.addstr.call_args == mock.call(
+        22, 0, dstatic.blue_screen_lines(23, 78)[22], 67)
+    screen.refresh.assert_called_once()
+
+
+@pytest.mark.parametrize("timeout, expected", [
+    (None, -1), (1.5, 1500), (0.0001, 0), (-2, 0),
+])
+def test_wait_for_key(timeout, expected):
+    screen = mock.Mock()
+    screen.getch.return_value = 102
+    assert dstatic.wait_for_key(screen, timeout) == 102
+    assert screen.timeout.call_args_list == [mock.call(expected),
+                                             mock.call(0)]
+
+
+def test_terminal_events_key():
+    read_fd, write_fd = os.pipe()
+    events = dstatic.TerminalEvents(read_fd)
+    try:
+        assert events.wait(0) is False
+        os.write(write_fd, b"q")
+        assert events.wait(1) is True
+    finally:
+        events.close()
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_terminal_events_resize():
+    read_fd, write_fd = os.pipe()
+    events = dstatic.TerminalEvents(read_fd)
+    try:
+        with mock.patch.object(dstatic.os, "get_terminal_size",
+                               return_value=(100, 30)), \
+                mock.patch.object(dstatic.curses, "is_term_resized",
+                                  return_value=True), \
+                mock.patch.object(dstatic.curses, "resizeterm") as resize:
+            os.kill(os.getpid(), signal.SIGWINCH)
+            assert events.wait(1) is True
+            resize.assert_called_once_with(30, 100)
+            assert events.wait(0) is False
+    finally:
+        events.close()
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_terminal_events_off_main_thread():
+    read_fd, write_fd = os.pipe()
+    errors = []
+
+    def run():
+        try:
+            dstatic.TerminalEvents(read_fd)
+        except ValueError as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    os.close(read_fd)
+    os.close(write_fd)
+    assert len(errors) == 1
+
+
+def test_static_off_main_thread():
+    screen = dstatic.NullScreen(10, 40, 3)
+    args = dstatic.argument_parser([])
+    sessions = []
+    with dstatic.headless_curses(screen):
+        thread = threading.Thread(
+            target=lambda: sessions.append(dstatic.static(screen, args)))
+        thread.start()
+        thread.join(5)
+    assert len(sessions) == 1
+    assert len(screen.frame_times) == 3
+
+
+def test_static_error_restores_signals():
+    read_fd, write_fd = os.pipe()
+    screen = dstatic.NullScreen(10, 40, 3)
+    args = dstatic.argument_parser([])
+    handler = signal.getsignal(signal.SIGWINCH)
+    try:
+        with dstatic.headless_curses(screen), \
+                mock.patch.object(dstatic, "TerminalEvents",
+                                  functools.partial(dstatic.TerminalEvents,
+                                                    read_fd)), \
+                mock.patch.object(dstatic.StaticSession, "draw",
+                                  side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                dstatic.static(screen, args)
+        assert signal.getsignal(signal.SIGWINCH) == handler
+        assert signal.set_wakeup_fd(-1) == -1
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_wait_for_key_events():
+    screen = mock.Mock()
+    screen.getch.return_value = -1
+    events = mock.Mock()
+    assert dstatic.wait_for_key(screen, 2.5, events) == -1
+    events.wait.assert_called_once_with(2.5)
+    screen.timeout.assert_not_called()
+
+
+def test_frame_scheduler_woken_early():
+    clock = mock.Mock(side_effect=[0.0, 0.03])
+    sleep = mock.Mock(return_value=True)
+    scheduler = dstatic.FrameScheduler(0.1, 0, clock, sleep)
+    scheduler.wait()
+    assert scheduler.deadline == pytest.approx(0.1)
+
+
+def test_static_session_freeze_keys():
+    screen = dstatic.NullScreen(10, 40, 0)
+    args = dstatic.argument_parser([])
+    with dstatic.headless_curses(screen):
+        session = dstatic.StaticSession(screen, args,
+                                        dstatic.FrameScheduler(0.1))
+        session.handle_key(102)  # f
+        assert session.frozen
+        session.handle_key(98)  # b is ignored while frozen
+        assert session.color_name == "all"
+        session.handle_key(102)
+        assert not session.frozen
+        session.handle_key(98)
+        assert session.color_name == "B&W"
+        assert session.color_changed
+        session.handle_key(113)  # q
+        assert not session.run
+
+
+def test_static_session_color_change_keeps_pairs():
+    screen = dstatic.NullScreen(10, 40, 0)
+    args = dstatic.argument_parser(["-a"])
+    with dstatic.headless_curses(screen) as curses:
+        session = dstatic.StaticSession(screen, args,
+                                        dstatic.FrameScheduler(0.1))
+        with mock.patch.object(curses, "init_pair") as init_pair, \
+                mock.patch.object(curses, "color_pair") as color_pair:
+            for key in [114, 116, 97, 121, 99, 98]:  # r t a y c b
+                session.handle_key(key)
+                session.draw()
+        init_pair.assert_not_called()
+        color_pair.assert_not_called()
+        assert session.color_name == "B&W"
+        assert (session.pairs, session.weights) == (
+            session.color_pairs.palette(["B&W"]))
+        assert session.attrs == session.color_pairs.attrs(session.pairs)
+
+
+def test_static_session_density_keys():
+    screen = dstatic.NullScreen(10, 40, 0)
+    args = dstatic.argument_parser(["--density", "0.15"])
+    with dstatic.headless_curses(screen):
+        session = dstatic.StaticSession(screen, args,
+                                        dstatic.FrameScheduler(0.1))
+        densities = []
+        for key in [45, 45, 43, 61, 43] + [43] * 8 + [100]:  # - + = d
+            session.handle_key(key)
+            densities.append(args.density)
+    assert densities == [0.1, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8,
+                         0.9, 1.0, 1.0, 1.0, 1.0]
+
+
+def test_static_session_adaptive_frame_cache():
+    screen = dstatic.NullScreen(10, 40, 0)
+    args = dstatic.argument_parser(["--adaptive", "--frame_cache", "2"])
+    with dstatic.headless_curses(screen):
+        session = dstatic.StaticSession(screen, args,
+                                        dstatic.FrameScheduler(0.1))
+        session.draw()
+        keys = []
+        for scale in [0.8, 0.55, 0.62, 0.74, 0.3]:
+            session.governor.scale = scale
+            session.draw()
+            keys.append(session.frame_cache.key[-1])
+        session.close()
+    full = 10 * 39 - 15
+    assert keys == [full, full * 3 // 4, full * 3 // 4, full * 3 // 4,
+                    full // 2]
+
+
+def test_static_async_without_add_reader():
+    screen = dstatic.NullScreen(10, 40, 3)
+    args = dstatic.argument_parser(["--asyncio"])
+    stdin = mock.Mock(**{"fileno.return_value": 0})
+    with dstatic.headless_curses(screen), \
+            mock.patch.object(sys, "stdin", stdin), \
+            mock.patch.object(asyncio.selector_events.BaseSelectorEventLoop,
+                              "add_reader", side_effect=NotImplementedError):
+        asyncio.run(asyncio.wait_for(dstatic.static_async(screen, args), 5))
+    assert len(screen.frame_times) == 3
+
+
+def test_run_benchmark_redundant_writes():
+    args = dstatic.argument_parser(["--benchmark", "5", "-b"])
+    result = dstatic.run_benchmark(args)
+    assert result["redundant_per_frame"] > 0
+    assert result["cells_per_frame"] + result["redundant_per_frame"] <= 24 * 79
+
+
+def test_run_benchmark_density():
+    full = dstatic.run_benchmark(dstatic.argument_parser(["--benchmark",
+                                                          "5"]))
+    args = dstatic.argument_parser(["--benchmark", "5", "--density", "0.1"])
+    assert dstatic.run_benchmark(args)["calls_per_frame"] < (
+        full["calls_per_frame"] / 3)
+
+
+def test_run_benchmark_seed():
+    args = dstatic.argument_parser(["--benchmark", "5", "--seed", "3",
+                                    "--density", "0.3"])
+    first = dstatic.run_benchmark(args)
+    second = dstatic.run_benchmark(args)
+    assert first["calls_per_frame"] == second["calls_per_frame"]
+    assert first["cells_per_frame"] == second["cells_per_frame"]
+
+
+def test_static_session_cycle():
+    clock = mock.Mock(side_effect=[0.0, 0.0, 5.0])
+    screen = dstatic.NullScreen(10, 40, 0)
+    args = dstatic.argument_parser(["-c"])
+    with dstatic.headless_curses(screen):
+        session = dstatic.StaticSession(screen, args,
+                                        dstatic.FrameScheduler(0.1, 0, clock))
+        assert session.color_name == "red"
+        session.cycle_time = 10
+        session.cycle()
+    assert session.color_name == "green"
+    assert session.cycle_time == 0
+    assert session.cycle_start == 5.0
 
 
 def test_list_commands(capsys):
@@ -162,6 +937,58 @@ def test_dstatic_exit(test_key):
         h.await_exit()
 
 
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_dstatic_engine(engine):
+    with Runner(*dstatic_cmd("--test_mode", "--engine", engine)) as h:
+        h.await_text("a")
+        h.write("b")
+        h.press("Enter")
+        h.await_text("B")
+
+
+def test_dstatic_frame_cache():
+    with Runner(*dstatic_cmd("--test_mode", "--frame_cache", "3")) as h:
+        h.await_text("a")
+        h.write("r")
+        h.press("Enter")
+        h.await_text("r")
+        sc = h.screenshot()
+        assert "a" not in sc
+
+
+def test_dstatic_threaded():
+    with Runner(*dstatic_cmd("--test_mode", "--threaded")) as h:
+        h.await_text("a")
+        h.write("b")
+        h.press("Enter")
+        h.await_text("B")
+        h.write("q")
+        h.press("Enter")
+        h.await_exit()
+
+
+def test_dstatic_workers():
+    with Runner(*dstatic_cmd("--test_mode", "--workers", "2")) as h:
+        h.await_text("a")
+        h.write("b")
+        h.press("Enter")
+        h.await_text("B")
+        h.write("q")
+        h.press("Enter")
+        h.await_exit()
+
+
+def test_dstatic_renderer_ansi():
+    with Runner(*dstatic_cmd("--test_mode", "--renderer", "ansi")) as h:
+        h.await_text("a")
+        h.write("b")
+        h.press("Enter")
+        h.await_text("B")
+        h.write("q")
+        h.press("Enter")
+        h.await_exit()
+
+
 def test_dstatic_exit_no_test_mode():
     with Runner(*dstatic_cmd()) as h:
         h.write("Q")
@@ -226,6 +1053,31 @@ def test_dstatic_start_timer_start():
         h.await_text("a")
 
 
+def test_dstatic_fps():
+    with Runner(*dstatic_cmd("--test_mode", "--fps", "30")) as h:
+        h.await_text("a")
+        h.write("q")
+        h.press("Enter")
+        h.await_exit()
+
+
+def test_dstatic_density():
+    with Runner(*dstatic_cmd("--test_mode", "--density", "0.2")) as h:
+        h.await_text("a")
+        h.write("-")
+        h.write("t")
+        h.press("Enter")
+        h.await_text("g")
+
+
+def test_dstatic_adaptive():
+    with Runner(*dstatic_cmd("--test_mode", "--adaptive", "-d0")) as h:
+        h.await_text("a")
+        h.write("t")
+        h.press("Enter")
+        h.await_text("g")
+
+
 def test_dstatic_run_timer_runs():
     with Runner(*dstatic_cmd("--test_mode", "-r", "2")) as h:
         h.default_timeout = 3
@@ -604,6 +1456,58 @@ def test_dstatic_freeze_screen():
         assert sc3 != sc2
 
 
+def test_dstatic_freeze_screen_run_timer_exits():
+    with Runner(*dstatic_cmd("--test_mode", "-r", "2")) as h:
+        h.default_timeout = 3
+        h.await_text("a")
+        h.write("f")
+        h.press("Enter")
+        h.await_exit()
+
+
+def test_dstatic_asyncio():
+    with Runner(*dstatic_cmd("--test_mode", "--asyncio")) as h:
+        h.await_text("a")
+        h.write("r")
+        h.press("Enter")
+        h.await_text("r")
+        h.write("q")
+        h.press("Enter")
+        h.await_exit()
+
+
+def test_dstatic_asyncio_cycle_colors():
+    with Runner(*dstatic_cmd("--test_mode", "--asyncio", "-c")) as h:
+        h.default_timeout = 3
+        h.await_text("r")
+        h.await_text("g")
+
+
+def test_dstatic_asyncio_run_timer_auto_exits():
+    with Runner(*dstatic_cmd("--test_mode", "--asyncio", "-r", "2")) as h:
+        h.default_timeout = 3
+        h.await_text("a")
+        h.await_exit()
+
+
+def test_dstatic_asyncio_freeze_screen():
+    with Runner(*dstatic_cmd("--test_mode", "--asyncio")) as h:
+        h.default_timeout = 3
+        h.await_text("a")
+        h.write("f")
+        h.press("Enter")
+        time.sleep(0.1)
+        sc1 = h.screenshot()
+        time.sleep(0.5)
+        sc2 = h.screenshot()
+        assert sc1 == sc2
+        h.write("f")
+        h.press("Enter")
+        h.write("t")
+        h.press("Enter")
+        h.await_text("g")
+
+
 def test_dstatic_freeze_screen_no_other_commands_working():
     with Runner(*dstatic_cmd("--test_mode")) as h:
         h.default_timeout = 3
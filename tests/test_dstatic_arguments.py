@@ -187,3 +187,173 @@ def test_argument_parsing_version(capsys):
         dstatic.argument_parser(["--version"])
     captured_output = capsys.readouterr().out
     assert f"{dstatic.VERSION}\n" == captured_output
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], "python"), (["--engine", "numpy"], "numpy"),
+    (["--engine", "python"], "python"),
+])
+def test_argument_parsing_engine(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.engine == expected_result
+
+
+def test_argument_parsing_engine_error():
+    with pytest.raises(SystemExit):
+        dstatic.argument_parser(["--engine", "rust"])
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], "curses"), (["--renderer", "ansi"], "ansi"),
+])
+def test_argument_parsing_renderer(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.renderer == expected_result
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], 0), (["--frame_cache", "8"], 8),
+])
+def test_argument_parsing_frame_cache(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.frame_cache == expected_result
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], False), (["--threaded"], True),
+])
+def test_argument_parsing_threaded(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.threaded is expected_result
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], False), (["--asyncio"], True),
+])
+def test_argument_parsing_asyncio(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.asyncio is expected_result
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], 0), (["--workers", "4"], 4),
+])
+def test_argument_parsing_workers(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.workers == expected_result
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], None), (["--fps", "30"], 30),
+])
+def test_argument_parsing_fps(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.fps == expected_result
+
+
+def test_argument_parsing_fps_error():
+    with pytest.raises(SystemExit):
+        dstatic.argument_parser(["--fps", "0"])
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ("1", 1.0), ("0.25", 0.25), (".05", 0.05),
+])
+def test_density_type(test_values, expected_result):
+    assert dstatic.density_type(test_values) == expected_result
+
+
+@pytest.mark.parametrize("test_values", ["0", "1.5", "-0.2", "half", ""])
+def test_density_type_error(test_values):
+    with pytest.raises(dstatic.argparse.ArgumentTypeError):
+        dstatic.density_type(test_values)
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], 1.0), (["--density", "0.3"], 0.3),
+])
+def test_argument_parsing_density(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.density == expected_result
+
+
+def test_argument_parsing_density_error():
+    with pytest.raises(SystemExit):
+        dstatic.argument_parser(["--density", "2"])
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], False), (["--adaptive"], True),
+])
+def test_argument_parsing_adaptive(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.adaptive is expected_result
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ("80x24", (24, 80)), ("500X150", (150, 500)),
+])
+def test_terminal_size(test_values, expected_result):
+    assert dstatic.terminal_size(test_values) == expected_result
+
+
+@pytest.mark.parametrize("test_values", [
+    "80", "80x", "x24", "1x24", "80x0", "a x b", "80x24x2", "",
+])
+def test_terminal_size_error(test_values):
+    with pytest.raises(dstatic.argparse.ArgumentTypeError):
+        dstatic.terminal_size(test_values)
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], (0, (24, 80))),
+    (["--benchmark", "100"], (100, (24, 80))),
+    (["--benchmark", "10", "--benchmark_size", "200x60"], (10, (60, 200))),
+])
+def test_argument_parsing_benchmark(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert (result.benchmark, result.benchmark_size) == expected_result
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], 0), (["--test_pattern", "1"], 1), (["--test_pattern", "3"], 3),
+])
+def test_argument_parsing_test_pattern(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.test_pattern == expected_result
+
+
+def test_argument_parsing_test_pattern_error():
+    with pytest.raises(SystemExit):
+        dstatic.argument_parser(["--test_pattern", "4"])
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], None), (["--seed", "42"], 42),
+])
+def test_argument_parsing_seed(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.seed == expected_result
+
+
+def test_argument_parsing_seed_error():
+    with pytest.raises(SystemExit):
+        dstatic.argument_parser(["--seed", "abc"])
+
+
+@pytest.mark.parametrize("test_values, expected_result", [
+    ([], "mt"), (["--rng", "pcg64"], "pcg64"),
+])
+def test_argument_parsing_rng(test_values, expected_result):
+    result = dstatic.argument_parser(test_values)
+    assert result.rng == expected_result
+
+
+def test_argument_parsing_rng_error():
+    with pytest.raises(SystemExit):
+        dstatic.argument_parser(["--rng", "xorshift"])
+
+
+def test_argument_parsing_benchmark_asyncio_error():
+    with pytest.raises(SystemExit):
+        dstatic.argument_parser(["--benchmark", "5", "--asyncio"])